@@ -1,14 +1,112 @@
-from django.contrib import admin
+from django import forms
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.exceptions import ValidationError
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import Max
+from django.utils.functional import cached_property
 
+from . import bulk
 from .models import Post, Group
 
+EXACT_COUNT_VAR = 'exact_count'
+
+
+def estimate_count(queryset):
+    """Оценка числа строк без полного COUNT(*).
+
+    Для таблицы без фильтров берётся статистика базы (ANALYZE) или максимальный pk,
+    для отфильтрованной выборки — COUNT, ограниченный ADMIN_EXACT_COUNT_LIMIT строками.
+    Возвращает пару (число, точное ли оно).
+    """
+    if not queryset.query.where:
+        table = queryset.model._meta.db_table
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+                row = cursor.fetchone()
+                if row and row[0] > 0:
+                    return row[0], False
+            elif connection.vendor == 'sqlite':
+                cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+                if cursor.fetchone():
+                    cursor.execute('SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1', [table])
+                    row = cursor.fetchone()
+                    if row:
+                        return int(row[0].split()[0]), False
+        if connection.vendor != 'postgresql':
+            top = queryset.aggregate(top=Max('pk'))['top'] or 0
+            if top > settings.ADMIN_EXACT_COUNT_LIMIT:
+                return top, False
+    limit = settings.ADMIN_EXACT_COUNT_LIMIT
+    count = queryset.order_by()[:limit + 1].count()
+    return min(count, limit), count <= limit
+
+
+class EstimatedCountPaginator(Paginator):
+    exact = False
+
+    @cached_property
+    def count(self):
+        if self.exact:
+            self.estimated = False
+            return super().count
+        count, exact = estimate_count(self.object_list)
+        self.estimated = not exact
+        return count
+
+
+class ExactCountPaginator(EstimatedCountPaginator):
+    exact = True
+
+
+class PostActionForm(ActionForm):
+    group = forms.ModelChoiceField(Group.objects.all(), required=False, label='Сообщество',
+                                   empty_label='без сообщества')
+
 
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group')
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
+    raw_id_fields = ('author',)
+    # второй COUNT по всей таблице ради «показать все» не нужен
+    show_full_result_count = False
+    action_form = PostActionForm
+    actions = ('move_to_group',)
     empty_value_display = '-пусто-'
 
+    def changelist_view(self, request, extra_context=None):
+        # точный подсчёт включается параметром ?exact_count=1, который ChangeList не должен видеть
+        params = request.GET.copy()
+        request.exact_count = params.pop(EXACT_COUNT_VAR, None) is not None
+        request.GET = params
+        params = params.copy()
+        params[EXACT_COUNT_VAR] = '1'
+        extra_context = {'exact_count_url': '?' + params.urlencode(), **(extra_context or {})}
+        return super().changelist_view(request, extra_context)
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        paginator = ExactCountPaginator if getattr(request, 'exact_count', False) else EstimatedCountPaginator
+        return paginator(queryset, per_page, orphans, allow_empty_first_page)
+
+    def move_to_group(self, request, queryset):
+        try:
+            group = self.action_form.base_fields['group'].clean(request.POST.get('group'))
+        except ValidationError:
+            self.message_user(request, 'Выбранное сообщество не найдено', messages.ERROR)
+            return
+        moved = bulk.move_to_group(queryset, group)
+        self.message_user(request, f'Перенесено записей: {moved}', messages.SUCCESS)
+    move_to_group.short_description = 'Перенести в выбранное сообщество'
+
+    def delete_queryset(self, request, queryset):
+        bulk.delete_posts(queryset)
+
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ('pk', 'title', 'slug', 'description')
@@ -0,0 +1,212 @@
+"""JSON API только для чтения: записи, сообщества, комментарии и лента подписок.
+
+Каждый ответ — один запрос к базе за страницей (плюс сессия для ленты):
+строки выбираются через values() без создания экземпляров моделей,
+лишние столбцы не читаются. Записи листаются keyset-курсором по
+(pub_date, id) из posts.pagination, сообщества и комментарии — по id.
+"""
+import json
+from functools import partial, wraps
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.functions import Substr
+from django.http import HttpResponse
+
+from .models import Comment, Group, Post
+from .pagination import CursorPaginator, decode_cursor, encode_key
+from .timeline import TimelinePaginator
+
+try:
+    # в несколько раз быстрее json; без него ответы кодирует стандартный модуль
+    import orjson
+except ImportError:
+    orjson = None
+
+PREVIEW_LENGTH = 200
+MAX_LIMIT = 100
+# поле ответа → столбец values(); preview — аннотация с началом текста
+POST_FIELDS = {
+    'id': 'id',
+    'author': 'author__username',
+    'group': 'group__slug',
+    'pub_date': 'pub_date',
+    'preview': 'preview',
+    'text': 'text',
+    'image': 'image',
+    'comments_count': 'comments_count',
+}
+DEFAULT_POST_FIELDS = ('id', 'author', 'group', 'pub_date', 'preview', 'image', 'comments_count')
+GROUP_FIELDS = ('id', 'slug', 'title', 'description')
+COMMENT_FIELDS = {'id': 'id', 'post': 'post_id', 'author': 'author__username', 'created': 'created', 'text': 'text'}
+
+
+class ApiError(Exception):
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def json_response(data, status=200):
+    if orjson is not None:
+        body = orjson.dumps(data)
+    else:
+        body = json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False).encode()
+    return HttpResponse(body, content_type='application/json', status=status)
+
+
+def api_view(view):
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return json_response({'error': 'Только чтение'}, status=405)
+        try:
+            return json_response(view(request, *args, **kwargs))
+        except ApiError as error:
+            return json_response({'error': str(error)}, status=error.status)
+    return wrapper
+
+
+def get_limit(request):
+    try:
+        limit = int(request.GET.get('limit', 20))
+    except ValueError:
+        raise ApiError('limit должен быть числом')
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def get_fields(request, allowed, default):
+    if 'fields' not in request.GET:
+        return list(default)
+    fields = [name for name in request.GET['fields'].split(',') if name]
+    unknown = [name for name in fields if name not in allowed]
+    if unknown or not fields:
+        raise ApiError(f'Неизвестные поля: {", ".join(unknown)}; доступны: {", ".join(allowed)}')
+    return fields
+
+
+def get_id_cursor(request):
+    try:
+        return int(request.GET['after']) if request.GET.get('after') else None
+    except ValueError:
+        raise ApiError('after должен быть id')
+
+
+def value(name, raw):
+    if raw is None:
+        return None
+    if name in ('pub_date', 'created'):
+        # одинаковый вид даты при orjson и json
+        return raw.isoformat()
+    if name == 'image':
+        return default_storage.url(raw) if raw else None
+    return raw
+
+
+def post_values(queryset, fields):
+    """values() с нужными столбцами; ключ курсора выбирается всегда."""
+    if 'preview' in fields:
+        queryset = queryset.annotate(preview=Substr('text', 1, PREVIEW_LENGTH))
+    columns = {POST_FIELDS[name] for name in fields} | {'id', 'pub_date'}
+    return queryset.values(*columns)
+
+
+def serialize(row, fields, columns):
+    return {name: value(name, row[columns[name]]) for name in fields}
+
+
+def post_page(request, queryset, paginator_class=CursorPaginator):
+    fields = get_fields(request, POST_FIELDS, DEFAULT_POST_FIELDS)
+    cursor = None
+    if request.GET.get('after'):
+        cursor = decode_cursor(request.GET['after'])
+        if cursor is None:
+            raise ApiError('Неверный курсор after')
+    paginator = paginator_class(post_values(queryset, fields), get_limit(request))
+    page = paginator.page_after(cursor)
+    rows = page.object_list
+    return {
+        'results': [serialize(row, fields, POST_FIELDS) for row in rows],
+        'next': encode_key(rows[-1]['pub_date'], rows[-1]['id']) if page.has_next() else None,
+    }
+
+
+@api_view
+def posts(request):
+    """Лента всех записей (?author=, ?group=) или выборка по ?ids=1,2,3 в заданном порядке."""
+    if 'ids' in request.GET:
+        return posts_by_ids(request)
+    queryset = Post.objects.all()
+    if request.GET.get('author'):
+        queryset = queryset.filter(author__username=request.GET['author'])
+    if request.GET.get('group'):
+        queryset = queryset.filter(group__slug=request.GET['group'])
+    return post_page(request, queryset)
+
+
+def posts_by_ids(request):
+    try:
+        ids = [int(pk) for pk in request.GET['ids'].split(',') if pk]
+    except ValueError:
+        raise ApiError('ids — числа через запятую')
+    if len(ids) > MAX_LIMIT:
+        raise ApiError(f'Не больше {MAX_LIMIT} ids за запрос')
+    fields = get_fields(request, POST_FIELDS, DEFAULT_POST_FIELDS)
+    rows = {row['id']: row for row in post_values(Post.objects.filter(pk__in=ids), fields)}
+    return {
+        'results': [serialize(rows[pk], fields, POST_FIELDS) for pk in ids if pk in rows],
+        'missing': [pk for pk in ids if pk not in rows],
+    }
+
+
+@api_view
+def post_detail(request, post_id):
+    fields = get_fields(request, POST_FIELDS, [name for name in POST_FIELDS if name != 'preview'])
+    row = post_values(Post.objects.filter(pk=post_id), fields).first()
+    if row is None:
+        raise ApiError('Запись не найдена', status=404)
+    return serialize(row, fields, POST_FIELDS)
+
+
+@api_view
+def post_comments(request, post_id):
+    fields = get_fields(request, COMMENT_FIELDS, COMMENT_FIELDS)
+    after = get_id_cursor(request)
+    limit = get_limit(request)
+    queryset = Comment.objects.filter(post_id=post_id).order_by('id')
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+    rows = list(queryset.values(*{COMMENT_FIELDS[name] for name in fields} | {'id'})[:limit + 1])
+    if not rows and after is None and not Post.objects.filter(pk=post_id).exists():
+        raise ApiError('Запись не найдена', status=404)
+    return {
+        'results': [serialize(row, fields, COMMENT_FIELDS) for row in rows[:limit]],
+        'next': str(rows[limit - 1]['id']) if len(rows) > limit else None,
+    }
+
+
+@api_view
+def groups(request):
+    fields = get_fields(request, GROUP_FIELDS, GROUP_FIELDS)
+    after = get_id_cursor(request)
+    limit = get_limit(request)
+    queryset = Group.objects.order_by('id')
+    if after is not None:
+        queryset = queryset.filter(id__gt=after)
+    rows = list(queryset.values(*set(fields) | {'id'})[:limit + 1])
+    return {
+        'results': [{name: row[name] for name in fields} for row in rows[:limit]],
+        'next': str(rows[limit - 1]['id']) if len(rows) > limit else None,
+    }
+
+
+@api_view
+def feed(request):
+    if not request.user.is_authenticated:
+        raise ApiError('Нужен вход', status=401)
+    if settings.FOLLOW_FEED_BACKEND == 'timeline':
+        return post_page(request, Post.objects.all(), partial(TimelinePaginator, user=request.user))
+    # кольца последних записей хранят только ключи — страницу проще взять из базы
+    return post_page(request, Post.objects.filter(author__following__user=request.user))
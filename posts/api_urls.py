@@ -0,0 +1,11 @@
+from django.urls import path
+
+from . import api
+
+urlpatterns = [
+    path('posts', api.posts, name='api_posts'),
+    path('posts/<int:post_id>', api.post_detail, name='api_post'),
+    path('posts/<int:post_id>/comments', api.post_comments, name='api_post_comments'),
+    path('groups', api.groups, name='api_groups'),
+    path('feed', api.feed, name='api_feed'),
+]
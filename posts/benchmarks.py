@@ -0,0 +1,173 @@
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from itertools import accumulate
+from urllib.parse import urlencode
+
+from django.core.management import call_command
+from django.db import connection, reset_queries
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .models import Comment, Follow, Group, Post, User
+
+BASE_DATE = datetime(2020, 1, 1, tzinfo=timezone.utc)
+WORDS = ('кошка', 'собака', 'город', 'утро', 'лето', 'река', 'книга', 'друг', 'дорога', 'музыка', 'море',
+         'работа', 'вечер', 'снег', 'поезд', 'кофе', 'дом', 'сад', 'окно', 'небо', 'python', 'django')
+
+
+def zipf_cum_weights(count, alpha):
+    """Накопленные веса степенного закона: k-й по популярности получает долю ~ 1 / k^alpha."""
+    return list(accumulate(1 / rank ** alpha for rank in range(1, count + 1)))
+
+
+def generate(users, posts, seed=0, follows_per_user=20, comments_per_post=2.0, alpha=1.1):
+    """Детерминированно наполняет базу: одинаковые аргументы дают одинаковые данные.
+
+    Авторы пишут и набирают подписчиков по степенному закону, число подписок
+    пользователя распределено по Парето, комментарии концентрируются на
+    популярных записях. Загрузка идёт через import_yatube, поэтому ленты,
+    счётчики и поисковый индекс строятся так же, как в боевой базе.
+    """
+    rng = random.Random(seed)
+    names = [f'user{i:06d}' for i in range(users)]
+    author_weights = zipf_cum_weights(users, alpha)
+    slugs = [f'group{i}' for i in range(max(1, users // 100))]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'synthetic.jsonl')
+        with open(path, 'w', encoding='utf-8') as target:
+            def write(row):
+                target.write(json.dumps(row, ensure_ascii=False) + '\n')
+
+            for name in names:
+                write({'model': 'user', 'username': name, 'date_joined': BASE_DATE.isoformat()})
+            for slug in slugs:
+                write({'model': 'group', 'slug': slug, 'title': slug.capitalize()})
+            authors = rng.choices(names, cum_weights=author_weights, k=posts)
+            for number, author in enumerate(authors):
+                text = ' '.join(rng.choices(WORDS, k=rng.randint(10, 60)))
+                pub_date = BASE_DATE + timedelta(minutes=number, seconds=rng.randrange(60))
+                write({'model': 'post', 'author': author, 'text': text, 'pub_date': pub_date.isoformat(),
+                       'group': rng.choice(slugs) if rng.random() < 0.7 else None})
+            # среднее распределения Парето с a=1.5 равно 3
+            for name in names:
+                count = min(users - 1, int(rng.paretovariate(1.5) * follows_per_user / 3))
+                for author in set(rng.choices(names, cum_weights=author_weights, k=count)) - {name}:
+                    write({'model': 'follow', 'user': name, 'author': author})
+        call_command('import_yatube', path, stdout=StringIO())
+
+    user_ids = list(User.objects.filter(username__in=names).order_by('pk').values_list('pk', flat=True))
+    post_ids = list(Post.objects.order_by('-pub_date', '-id').values_list('pk', flat=True)[:posts])
+    total = int(posts * comments_per_post)
+    if post_ids and total:
+        targets = rng.choices(post_ids, cum_weights=zipf_cum_weights(len(post_ids), alpha), k=total)
+        Comment.objects.bulk_create(
+            [Comment(post_id=post_id, author_id=rng.choice(user_ids), text=' '.join(rng.choices(WORDS, k=8)))
+             for post_id in targets])
+        call_command('recount_counters', stdout=StringIO())
+    return {'users': users, 'posts': posts, 'groups': len(slugs), 'follows': Follow.objects.count(),
+            'comments': total}
+
+
+def view_requests():
+    """Запрос для каждого маршрута posts/urls.py на данных generate().
+
+    Возвращает словарь имя → (пользователь, url, подготовка перед каждым замером
+    или None). Публичные страницы открывает читатель: анонимные ответы берутся
+    из кэша страниц и не показывают стоимость представления. Маршрут без записи
+    здесь бенчмарк покажет как пропущенный.
+    """
+    author = User.objects.get(pk=Post.objects.values('author').annotate(n=Count('pk')).order_by('-n')[0]['author'])
+    reader = User.objects.get(pk=Follow.objects.values('user').annotate(n=Count('pk')).order_by('-n')[0]['user'])
+    post = Post.objects.filter(author=author).order_by('-pub_date', '-id').first()
+    group = Group.objects.annotate(n=Count('posts')).order_by('-n').first()
+    stranger = User.objects.exclude(pk=reader.pk).exclude(following__user=reader).order_by('pk').first()
+    word = post.text.split()[0]
+
+    def unfollow():
+        Follow.objects.filter(user=reader, author=stranger).delete()
+
+    def follow():
+        Follow.objects.get_or_create(user=reader, author=stranger)
+
+    return {
+        'index': (reader, reverse('index'), None),
+        'follow_index': (reader, reverse('follow_index'), None),
+        'new_post': (author, reverse('new_post'), None),
+        'search': (reader, f"{reverse('search')}?{urlencode({'q': word})}", None),
+        'profile': (reader, reverse('profile', args=[author.username]), None),
+        'export': (author, reverse('export', args=[author.username]), None),
+        'post': (reader, reverse('post', args=[author.username, post.pk]), None),
+        'post_edit': (author, reverse('post_edit', args=[author.username, post.pk]), None),
+        'group': (reader, reverse('group', args=[group.slug]), None),
+        'add_comment': (reader, reverse('add_comment', args=[author.username, post.pk]), None),
+        'profile_follow': (reader, reverse('profile_follow', args=[stranger.username]), unfollow),
+        'profile_unfollow': (reader, reverse('profile_unfollow', args=[stranger.username]), follow),
+    }
+
+
+def fetch(client, url):
+    response = client.get(url)
+    # потоковые ответы считаются целиком, как их отдал бы сервер
+    body = b''.join(response.streaming_content) if response.streaming else response.content
+    return response, len(body)
+
+
+def measure(user, url, prepare=None, repeat=20, anonymous=False):
+    """Латентность (медиана, p95, среднее в мс) и число запросов к базе для одного url."""
+    client = Client()
+    if not anonymous:
+        client.force_login(user)
+    if prepare:
+        prepare()
+    fetch(client, url)
+    if prepare:
+        prepare()
+    # request_started очищает журнал запросов, поэтому число берётся сразу после замера
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        response, size = fetch(client, url)
+    query_count = len(queries)
+    timings = []
+    for _ in range(repeat):
+        if prepare:
+            prepare()
+        started = time.perf_counter()
+        fetch(client, url)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return {
+        'url': url,
+        'status': response.status_code,
+        'bytes': size,
+        'queries': query_count,
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 3),
+        'mean_ms': round(statistics.mean(timings), 3),
+    }
+
+
+def compare(baseline, current, threshold, min_delta_ms=1.0):
+    """Строки current с отношением медиан к baseline.
+
+    regression — больше запросов к базе или медиана выросла больше порога;
+    прирост меньше min_delta_ms считается шумом.
+    """
+    previous = {(row['scale'], row['view']): row for row in baseline['results']}
+    rows = []
+    for row in current['results']:
+        old = previous.get((row['scale'], row['view']))
+        if old is None:
+            continue
+        ratio = row['p50_ms'] / old['p50_ms'] if old['p50_ms'] else 1.0
+        rows.append({**row, 'ratio': round(ratio, 3), 'old_p50_ms': old['p50_ms'], 'old_queries': old['queries'],
+                     'regression': (ratio > threshold and row['p50_ms'] - old['p50_ms'] > min_delta_ms)
+                     or row['queries'] > old['queries']})
+    return rows
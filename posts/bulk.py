@@ -0,0 +1,42 @@
+from collections import Counter
+
+from django.db import transaction
+
+from . import fulltext, page_cache, recent_posts
+from .models import Post
+from .signals import bulk_deletes, bump_stats
+
+# SQLite ограничивает число параметров запроса 999
+BATCH_SIZE = 500
+
+
+def move_to_group(queryset, group):
+    """Переносит записи в сообщество одним UPDATE; возвращает число записей."""
+    moved = queryset.update(group=group)
+    # затронуты ленты нескольких сообществ и авторов — проще сбросить все страницы
+    page_cache.bump(('site',))
+    return moved
+
+
+def delete_posts(queryset):
+    """Удаляет записи пачками, не выполняя обработчики удаления на каждый объект.
+
+    Счётчики авторов, кольца последних записей, поисковый индекс и кэш страниц
+    поправляются один раз на всю выборку. Возвращает число удалённых записей.
+    """
+    rows = list(queryset.order_by().values_list('pk', 'author_id'))
+    deleted = Counter(author_id for _, author_id in rows)
+    ids = [pk for pk, _ in rows]
+    with transaction.atomic():
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start:start + BATCH_SIZE]
+            # комментарии и строки лент удаляются каскадом
+            with bulk_deletes():
+                Post.objects.filter(pk__in=batch).delete()
+            fulltext.unindex_many(batch)
+        for author_id, count in deleted.items():
+            bump_stats(author_id, 'posts_count', -count)
+    for author_id in deleted:
+        recent_posts.refresh(author_id)
+    page_cache.bump(('site',))
+    return len(ids)
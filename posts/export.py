@@ -0,0 +1,122 @@
+import csv
+import zipfile
+
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Comment, Post
+
+# строк, которые база отдаёт за один fetchmany; память не зависит от числа записей автора
+CHUNK_SIZE = 2000
+# кусок файла изображения, который копируется в архив за раз
+FILE_CHUNK_SIZE = 64 * 1024
+CSV_FIELDS = ('model', 'id', 'post', 'pub_date', 'group', 'text', 'image')
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+    'zip': 'application/zip',
+}
+
+
+def records(author):
+    """Записи, затем комментарии автора — словарями, без создания экземпляров моделей."""
+    posts = (Post.objects.filter(author=author).order_by('pk')
+             .values_list('id', 'pub_date', 'group__slug', 'text', 'image'))
+    for pk, pub_date, group, text, image in posts.iterator(chunk_size=CHUNK_SIZE):
+        yield {'model': 'post', 'id': pk, 'pub_date': pub_date, 'group': group, 'text': text,
+               'image': image or None}
+    comments = (Comment.objects.filter(author=author).order_by('pk')
+                .values_list('id', 'post_id', 'created', 'text'))
+    for pk, post_id, created, text in comments.iterator(chunk_size=CHUNK_SIZE):
+        yield {'model': 'comment', 'id': pk, 'post': post_id, 'pub_date': created, 'text': text}
+
+
+def ndjson_lines(author):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for record in records(author):
+        yield encoder.encode(record) + '\n'
+
+
+class Echo:
+    """Файлоподобный объект для csv.writer: возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(author):
+    writer = csv.DictWriter(Echo(), CSV_FIELDS)
+    yield writer.writeheader()
+    for record in records(author):
+        yield writer.writerow(record)
+
+
+class ZipStream:
+    """Приёмник для zipfile без seek: накопленные байты забираются после каждой порции."""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def image_names(author):
+    names = (Post.objects.filter(author=author).exclude(image='').exclude(image__isnull=True)
+             .order_by('pk').values_list('image', flat=True))
+    return names.iterator(chunk_size=CHUNK_SIZE)
+
+
+def open_image(name):
+    try:
+        return default_storage.open(name, 'rb')
+    except (OSError, SuspiciousFileOperation):
+        # файл потерян или путь вне MEDIA_ROOT — в архив попадёт только запись
+        return None
+
+
+def zip_chunks(author):
+    """Архив с posts.ndjson и изображениями, собираемый на лету.
+
+    zipfile пишет в поток без seek с дескрипторами данных после каждого файла,
+    поэтому наружу уходят готовые куски, а в памяти держится не больше одной порции.
+    """
+    stream = ZipStream()
+    with zipfile.ZipFile(stream, 'w', zipfile.ZIP_DEFLATED) as archive:
+        with archive.open('posts.ndjson', 'w', force_zip64=True) as entry:
+            for line in ndjson_lines(author):
+                entry.write(line.encode())
+                if sum(map(len, stream.chunks)) >= FILE_CHUNK_SIZE:
+                    yield stream.drain()
+        yield stream.drain()
+        for name in image_names(author):
+            source = open_image(name)
+            if source is None:
+                continue
+            # изображения уже сжаты, повторное сжатие только тратит процессор
+            info = zipfile.ZipInfo(f'images/{name}')
+            info.compress_type = zipfile.ZIP_STORED
+            with source, archive.open(info, 'w', force_zip64=True) as entry:
+                for chunk in iter(lambda: source.read(FILE_CHUNK_SIZE), b''):
+                    entry.write(chunk)
+                    yield stream.drain()
+            yield stream.drain()
+    yield stream.drain()
+
+
+def stream(author, export_format):
+    if export_format == 'csv':
+        return csv_lines(author)
+    if export_format == 'zip':
+        return (chunk for chunk in zip_chunks(author) if chunk)
+    return ndjson_lines(author)
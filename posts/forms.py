@@ -1,5 +1,7 @@
+from django.core.files.uploadedfile import UploadedFile
 from django.forms import ModelForm
 
+from posts import uploads
 from posts.models import Post, Comment
 
 
@@ -11,6 +13,13 @@ class PostForm(ModelForm):
                   'group': 'Группа',
                   'image': 'Изображение', }
 
+    def clean_image(self):
+        image = self.cleaned_data.get('image')
+        # новая загрузка проверяется и ужимается, уже сохранённый файл остаётся как есть
+        if isinstance(image, UploadedFile):
+            return uploads.prepare(image)
+        return image
+
 
 class CommentForm(ModelForm):
     class Meta:
@@ -0,0 +1,211 @@
+import re
+from functools import lru_cache
+
+from django.db import connection, transaction
+from django.db.utils import OperationalError
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+TABLE = 'posts_post_fts'
+WORD = re.compile(r'\w+')
+
+# Стеммер Портера для русского языка (вариант Snowball без словаря исключений)
+VOWELS = 'аеиоуыэюя'
+RVRE = re.compile(rf'^(.*?[{VOWELS}])(.*)$')
+PERFECTIVEGROUND = re.compile(r'((ив|ивши|ившись|ыв|ывши|ывшись)|((?<=[ая])(в|вши|вшись)))$')
+REFLEXIVE = re.compile(r'(с[яь])$')
+ADJECTIVE = re.compile(r'(ее|ие|ые|ое|ими|ыми|ей|ий|ый|ой|ем|им|ым|ом|его|ого|ему|ому|их|ых|ую|юю|ая|яя|ою|ею)$')
+PARTICIPLE = re.compile(r'((ивш|ывш|ующ)|((?<=[ая])(ем|нн|вш|ющ|щ)))$')
+VERB = re.compile(r'((ила|ыла|ена|ейте|уйте|ите|или|ыли|ей|уй|ил|ыл|им|ым|ен|ило|ыло|ено|ят|ует|уют|ит|ыт|ены|ить'
+                  r'|ыть|ишь|ую|ю)|((?<=[ая])(ла|на|ете|йте|ли|й|л|ем|н|ло|но|ет|ют|ны|ть|ешь|нно)))$')
+NOUN = re.compile(r'(а|ев|ов|ие|ье|е|иями|ями|ами|еи|ии|и|ией|ей|ой|ий|й|иям|ям|ием|ем|ам|ом|о|у|ах|иях|ях|ы|ь|ию'
+                  r'|ью|ю|ия|ья|я)$')
+DERIVATIONAL = re.compile(rf'.*[^{VOWELS}]+[{VOWELS}].*ость?$')
+DER = re.compile(r'ость?$')
+SUPERLATIVE = re.compile(r'(ейше|ейш)$')
+
+
+def stem(word):
+    return stem_lower(word.lower().replace('ё', 'е'))
+
+
+# словарь живых текстов невелик: основа слова считается один раз на процесс
+@lru_cache(maxsize=100000)
+def stem_lower(word):
+    match = RVRE.match(word)
+    if match is None:
+        return word
+    start, rv = match.groups()
+    temp = PERFECTIVEGROUND.sub('', rv, 1)
+    if temp == rv:
+        rv = REFLEXIVE.sub('', rv, 1)
+        temp = ADJECTIVE.sub('', rv, 1)
+        if temp != rv:
+            rv = PARTICIPLE.sub('', temp, 1)
+        else:
+            temp = VERB.sub('', rv, 1)
+            rv = NOUN.sub('', rv, 1) if temp == rv else temp
+    else:
+        rv = temp
+    rv = re.sub('и$', '', rv, 1)
+    if DERIVATIONAL.match(rv):
+        rv = DER.sub('', rv, 1)
+    temp = re.sub('ь$', '', rv, 1)
+    if temp == rv:
+        rv = SUPERLATIVE.sub('', rv, 1)
+        rv = re.sub('нн$', 'н', rv, 1)
+    else:
+        rv = temp
+    return start + rv
+
+
+def terms(text):
+    return ' '.join(stem(word) for word in WORD.findall(text))
+
+
+# есть ли таблица индекса в базе (по имени базы): проверяется один раз на процесс,
+# create_table и drop_table обновляют ответ сами
+_available = {}
+
+
+def available():
+    if connection.vendor != 'sqlite':
+        return False
+    name = connection.settings_dict['NAME']
+    if name not in _available:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [TABLE])
+            _available[name] = cursor.fetchone() is not None
+    return _available[name]
+
+
+def create_table(schema_editor=None):
+    cursor_owner = schema_editor.connection if schema_editor else connection
+    if cursor_owner.vendor != 'sqlite':
+        return False
+    try:
+        with cursor_owner.cursor() as cursor:
+            cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} "
+                           f"USING fts5(terms, tokenize = 'unicode61 remove_diacritics 2')")
+    except OperationalError:
+        # SQLite собран без FTS5 — поиск работает через LIKE
+        return False
+    _available[cursor_owner.settings_dict['NAME']] = True
+    return True
+
+
+def drop_table(schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+    _available[schema_editor.connection.settings_dict['NAME']] = False
+
+
+def index(post_id, text):
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'INSERT OR REPLACE INTO {TABLE} (rowid, terms) VALUES (%s, %s)', [post_id, terms(text)])
+
+
+def unindex(post_id):
+    if not available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid = %s', [post_id])
+
+
+def unindex_many(post_ids):
+    if not post_ids or not available():
+        return
+    placeholders = ', '.join(['%s'] * len(post_ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE} WHERE rowid IN ({placeholders})', list(post_ids))
+
+
+def rebuild(rows, batch_size=1000):
+    """Перестраивает индекс из итератора пар (id, text); возвращает число записей."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+    total = 0
+    batch = []
+    for post_id, text in rows:
+        batch.append((post_id, terms(text)))
+        if len(batch) >= batch_size:
+            total += insert_batch(batch)
+            batch = []
+    return total + insert_batch(batch)
+
+
+def insert_batch(batch):
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(f'INSERT OR REPLACE INTO {TABLE} (rowid, terms) VALUES (%s, %s)', batch)
+    return len(batch)
+
+
+def match_expression(query):
+    # каждое слово запроса — префикс основы, все слова обязательны
+    return ' '.join(f'"{stem(word)}"*' for word in WORD.findall(query))
+
+
+def highlight(text, query, width=30):
+    """Фрагмент текста вокруг первого совпадения со словами запроса, совпадения в <mark>."""
+    stems = [stem(word) for word in WORD.findall(query)]
+    words = list(WORD.finditer(text))
+    hits = [i for i, word in enumerate(words) if any(stem(word.group()).startswith(s) for s in stems)]
+    if not words:
+        return ''
+    first = max((hits[0] if hits else 0) - width // 3, 0)
+    window = words[first:first + width]
+    hits = set(hits)
+    parts = ['… ' if first else '']
+    position = window[0].start()
+    for offset, word in enumerate(window, first):
+        parts.append(escape(text[position:word.start()]))
+        parts.append(f'<mark>{escape(word.group())}</mark>' if offset in hits else escape(word.group()))
+        position = word.end()
+    if first + width < len(words):
+        parts.append(' …')
+    return mark_safe(''.join(parts))
+
+
+class SearchResults:
+    """Ранжированная выдача, совместимая с django.core.paginator.Paginator."""
+
+    def __init__(self, query):
+        from .models import Post
+        self.query = query
+        self.expression = match_expression(query)
+        self.fts = available()
+        self.posts = Post.objects.select_related('author', 'group')
+        self.fallback = self.posts.order_by('-pub_date', '-id')
+        for word in WORD.findall(query):
+            self.fallback = self.fallback.filter(text__icontains=word)
+
+    def count(self):
+        if not self.expression:
+            return 0
+        if not self.fts:
+            return self.fallback.count()
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT count(*) FROM {TABLE} WHERE {TABLE} MATCH %s', [self.expression])
+            return cursor.fetchone()[0]
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, page):
+        if not self.expression:
+            return []
+        if not self.fts:
+            posts = list(self.fallback[page])
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s ORDER BY rank LIMIT %s OFFSET %s',
+                               [self.expression, page.stop - page.start, page.start])
+                ids = [row[0] for row in cursor.fetchall()]
+            found = self.posts.in_bulk(ids)
+            posts = [found[pk] for pk in ids if pk in found]
+        for post in posts:
+            post.snippet = highlight(post.text, self.query)
+        return posts
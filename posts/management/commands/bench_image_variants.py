@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from sorl.thumbnail import default
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает объём картинок страницы ленты: прежний JPEG 960x480 против варианта из srcset'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=5, help='Сколько первых страниц главной учитывать')
+        parser.add_argument('--viewport', type=int, default=414, help='Ширина окна браузера в CSS-пикселях')
+        parser.add_argument('--dpr', type=float, default=2, help='Плотность пикселей экрана')
+
+    def handle(self, *args, **options):
+        need = options['viewport'] * options['dpr']
+        posts = Post.objects.order_by('-pub_date', '-id')[:options['pages'] * 10]
+        pages = [posts[i:i + 10] for i in range(0, len(posts), 10)]
+        total_legacy = total_variant = 0
+        for number, page in enumerate(pages, 1):
+            legacy = variant = 0
+            for post in page:
+                if not post.image:
+                    continue
+                legacy += self.size(post.image.name, thumbnails.CARD_SPEC)
+                variant += self.size(post.image.name, self.pick(need))
+            total_legacy += legacy
+            total_variant += variant
+            self.stdout.write(f'страница {number}: {legacy} -> {variant} байт, экономия {legacy - variant}')
+        self.stdout.write(f'итого: {total_legacy} -> {total_variant} байт, экономия {total_legacy - total_variant}')
+
+    def pick(self, need):
+        # браузер берёт первый WebP-вариант не уже нужной ширины, иначе самый широкий
+        webp = [(width, spec) for width, image_format, spec in thumbnails.VARIANTS if image_format == 'WEBP']
+        for width, spec in webp:
+            if width >= need:
+                return spec
+        return webp[-1][1]
+
+    def size(self, name, spec):
+        thumbnail = thumbnails.thumbnail_file(name, *spec)
+        if not thumbnail.exists():
+            thumbnails.generate(name)
+        return default.storage.size(thumbnail.name)
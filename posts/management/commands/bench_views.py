@@ -0,0 +1,89 @@
+import json
+import platform
+import subprocess
+from datetime import datetime
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.urls import get_resolver
+
+from posts import benchmarks
+
+
+class Command(BaseCommand):
+    help = ('Замеряет латентность и число запросов всех представлений posts/urls.py на синтетических данных. '
+            'Каждый масштаб строится в отдельной временной тестовой базе.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scales', default='1000,10000',
+                            help='Числа записей через запятую; пользователей в 10 раз меньше')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--repeat', type=int, default=20, help='Замеров на представление')
+        parser.add_argument('--anonymous', action='store_true',
+                            help='Открывать страницы без входа (публичные отдаются из кэша страниц)')
+        parser.add_argument('--output', help='Куда записать результаты в JSON')
+        parser.add_argument('--compare', help='JSON прошлого прогона для сравнения')
+        parser.add_argument('--threshold', type=float, default=1.25,
+                            help='Во сколько раз медиана может вырасти, не считаясь регрессией')
+        parser.add_argument('--min-delta', type=float, default=1.0,
+                            help='Прирост медианы в мс, который считается шумом')
+
+    def handle(self, *args, **options):
+        scales = [int(scale) for scale in options['scales'].split(',') if scale]
+        report = {'meta': self.meta(options), 'results': []}
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=['testserver'], THUMBNAIL_WORKERS=0):
+            for scale in scales:
+                report['results'].extend(self.run_scale(scale, options))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as target:
+                json.dump(report, target, ensure_ascii=False, indent=2)
+        if options['compare']:
+            with open(options['compare'], encoding='utf-8') as source:
+                rows = benchmarks.compare(json.load(source), report, options['threshold'],
+                                          options['min_delta'])
+            self.print_comparison(rows)
+            if any(row['regression'] for row in rows):
+                raise CommandError('Есть регрессии относительно ' + options['compare'])
+
+    def meta(self, options):
+        try:
+            revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                      cwd=settings.BASE_DIR).stdout.strip()
+        except OSError:
+            revision = ''
+        return {'date': datetime.now().isoformat(timespec='seconds'), 'revision': revision,
+                'python': platform.python_version(), 'django': django.get_version(),
+                'database': connection.vendor, 'seed': options['seed'], 'repeat': options['repeat'],
+                'anonymous': options['anonymous']}
+
+    def run_scale(self, scale, options):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            cache.clear()
+            data = benchmarks.generate(max(10, scale // 10), scale, seed=options['seed'])
+            self.stdout.write(f'масштаб {scale}: {data}')
+            requests = benchmarks.view_requests()
+            results = []
+            for pattern in get_resolver('posts.urls').url_patterns:
+                if pattern.name not in requests:
+                    self.stderr.write(f'  {pattern.name}: нет запроса для замера, пропущено')
+                    continue
+                user, url, prepare = requests[pattern.name]
+                row = benchmarks.measure(user, url, prepare, options['repeat'], options['anonymous'])
+                results.append({'scale': scale, 'view': pattern.name, **row})
+                self.stdout.write(f"  {pattern.name:<18} {row['status']} {row['queries']:>3} запросов  "
+                                  f"p50 {row['p50_ms']:>8.2f} мс  p95 {row['p95_ms']:>8.2f} мс")
+            return results
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def print_comparison(self, rows):
+        for row in rows:
+            mark = 'РЕГРЕССИЯ' if row['regression'] else ''
+            self.stdout.write(f"{row['scale']:>8} {row['view']:<18} {row['old_p50_ms']:>8.2f} -> {row['p50_ms']:>8.2f} мс "
+                              f"(x{row['ratio']:.2f}), запросов {row['old_queries']} -> {row['queries']} {mark}")
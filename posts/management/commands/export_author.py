@@ -0,0 +1,31 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import export
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = 'Выгружает записи и комментарии автора в NDJSON, CSV или zip-архив с изображениями'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--format', choices=tuple(export.CONTENT_TYPES), default='ndjson')
+        parser.add_argument('--output', default='-', help='Файл для выгрузки; «-» — stdout')
+
+    def handle(self, *args, **options):
+        author = User.objects.filter(username=options['username']).first()
+        if author is None:
+            raise CommandError(f'Пользователь {options["username"]} не найден')
+        binary = options['format'] == 'zip'
+        if options['output'] == '-':
+            target = sys.stdout.buffer if binary else sys.stdout
+            self.write(export.stream(author, options['format']), target)
+            return
+        with open(options['output'], 'wb' if binary else 'w', **({} if binary else {'encoding': 'utf-8'})) as target:
+            self.write(export.stream(author, options['format']), target)
+
+    def write(self, chunks, target):
+        for chunk in chunks:
+            target.write(chunk)
@@ -0,0 +1,45 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Строит миниатюры для всех изображений записей в пуле процессов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                            help='Число процессов')
+
+    def handle(self, *args, **options):
+        names = (Post.objects.exclude(image='').exclude(image__isnull=True)
+                 .order_by('pk').values_list('image', flat=True))
+        started = time.monotonic()
+        done = failed = 0
+        with ProcessPoolExecutor(max_workers=options['workers'],
+                                 mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=thumbnails.init_worker) as pool:
+            pending = set()
+            for name in names.iterator():
+                pending.add(pool.submit(thumbnails.generate, name))
+                # в очереди держим ограниченное число задач, чтобы не копить миллионы futures
+                if len(pending) >= options['workers'] * 4:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    done, failed = self.collect(finished, done, failed)
+            done, failed = self.collect(wait(pending).done, done, failed)
+        elapsed = time.monotonic() - started
+        self.stdout.write(f'Готово: {done}, ошибок: {failed}, {elapsed:.1f} с')
+
+    def collect(self, futures, done, failed):
+        for future in futures:
+            if future.exception() is None:
+                done += 1
+            else:
+                failed += 1
+                self.stderr.write(f'{future.exception()}')
+        return done, failed
@@ -0,0 +1,243 @@
+import csv
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from itertools import groupby
+from operator import itemgetter
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import fulltext, page_cache, recent_posts, timeline
+from posts.models import AuthorStats, Follow, Group, Post, User
+
+# порядок сброса буферов: ссылки разрешаются только на уже вставленные строки
+MODELS = ('user', 'group', 'post', 'follow')
+
+
+@contextmanager
+def explicit_auto_now_add(model, name):
+    """bulk_create перезаписывает поля auto_now_add — на время загрузки это отключается."""
+    field = model._meta.get_field(name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def parse_date(value):
+    if not value:
+        return timezone.now()
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f'не удалось разобрать дату {value!r}')
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+class IdMap:
+    """Естественный ключ (username, slug) → id; промахи дочитываются из базы одним запросом на пачку."""
+
+    def __init__(self, model, field):
+        self.model = model
+        self.field = field
+        self.ids = {}
+
+    def load(self, keys):
+        missing = {key for key in keys if key and key not in self.ids}
+        if missing:
+            self.ids.update(self.model.objects.filter(**{f'{self.field}__in': missing})
+                            .values_list(self.field, 'pk'))
+
+    def get(self, key):
+        return self.ids.get(key)
+
+
+class Command(BaseCommand):
+    help = ('Потоково загружает пользователей, сообщества, записи и подписки из JSON Lines или CSV. '
+            'В JSON Lines у каждой строки есть поле "model": user, group, post или follow; '
+            'CSV содержит одну модель, она берётся из --model или из имени файла (posts.csv).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Файлы .jsonl или .csv; «-» — JSON Lines из stdin')
+        parser.add_argument('--model', choices=MODELS, help='Модель строк CSV')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Сколько строк вставлять в одной транзакции')
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.buffers = {model: [] for model in MODELS}
+        self.counts = dict.fromkeys(MODELS, 0)
+        self.skipped = 0
+        self.users = IdMap(User, 'username')
+        self.groups = IdMap(Group, 'slug')
+        self.next_ids = {model: self.last_id(model) + 1 for model in (User, Group, Post, Follow)}
+        self.verbosity = options['verbosity']
+        self.first_follow_id = self.next_ids[Follow]
+        self.touched_users = set()
+        self.post_authors = set()
+
+        started = time.monotonic()
+        with explicit_auto_now_add(Post, 'pub_date'):
+            for path in options['paths']:
+                for model, row in self.read(path, options['model']):
+                    self.buffers[model].append(row)
+                    if len(self.buffers[model]) >= self.batch_size:
+                        self.flush()
+            self.flush()
+        loaded = time.monotonic() - started
+        self.finish()
+
+        total = sum(self.counts.values())
+        elapsed = time.monotonic() - started
+        summary = ', '.join(f'{model}: {count}' for model, count in self.counts.items())
+        self.stdout.write(f'Импортировано {total} строк ({summary}), пропущено {self.skipped}')
+        self.stdout.write(f'Загрузка {loaded:.1f} с ({total / max(loaded, 1e-6):.0f} строк/с), '
+                          f'всего с пересчётами {elapsed:.1f} с')
+
+    def read(self, path, model):
+        if path != '-' and path.endswith('.csv'):
+            model = model or os.path.splitext(os.path.basename(path))[0].rstrip('s')
+            if model not in MODELS:
+                raise CommandError(f'Не удалось определить модель строк {path}, укажите --model')
+            with open(path, newline='', encoding='utf-8') as source:
+                for row in csv.DictReader(source):
+                    yield model, row
+            return
+        source = sys.stdin if path == '-' else open(path, encoding='utf-8')
+        try:
+            for number, line in enumerate(source, 1):
+                if not line.strip():
+                    continue
+                row = json.loads(line)
+                row_model = row.pop('model', model)
+                if row_model not in MODELS:
+                    raise CommandError(f'{path}:{number}: неизвестная модель {row_model!r}')
+                yield row_model, row
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+    def flush(self):
+        for model in MODELS:
+            rows, self.buffers[model] = self.buffers[model], []
+            if rows:
+                with transaction.atomic():
+                    inserted = getattr(self, f'insert_{model}s')(rows)
+                self.counts[model] += inserted
+                self.skipped += len(rows) - inserted
+                if self.verbosity > 1:
+                    self.stdout.write(f'{model}: {self.counts[model]}')
+
+    def last_id(self, model):
+        last = model.objects.aggregate(top=Max('pk'))['top'] or 0
+        if connection.vendor == 'sqlite':
+            # AUTOINCREMENT не выдаёт id удалённых строк повторно — импорт тоже не должен
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = %s', [model._meta.db_table])
+                row = cursor.fetchone()
+            last = max(last, row[0] if row else 0)
+        return last
+
+    def allocate(self, model, count):
+        # id назначаются заранее: SQLite не возвращает pk из bulk_create, а карты нужны сразу
+        first = self.next_ids[model]
+        self.next_ids[model] = first + count
+        return range(first, first + count)
+
+    def insert_users(self, rows):
+        self.users.load(row['username'] for row in rows)
+        fresh = {}
+        for row in rows:
+            if row['username'] not in self.users.ids and row['username'] not in fresh:
+                fresh[row['username']] = row
+        # пароль переносится только готовым хэшем, иначе вход по паролю закрыт
+        unusable = make_password(None)
+        users = [User(pk=pk, username=username, email=row.get('email') or '',
+                      first_name=row.get('first_name') or '', last_name=row.get('last_name') or '',
+                      password=row.get('password') or unusable, date_joined=parse_date(row.get('date_joined')))
+                 for pk, (username, row) in zip(self.allocate(User, len(fresh)), fresh.items())]
+        User.objects.bulk_create(users)
+        self.users.ids.update((user.username, user.pk) for user in users)
+        return len(users)
+
+    def insert_groups(self, rows):
+        self.groups.load(row['slug'] for row in rows)
+        fresh = {}
+        for row in rows:
+            if row['slug'] not in self.groups.ids and row['slug'] not in fresh:
+                fresh[row['slug']] = row
+        groups = [Group(pk=pk, slug=slug, title=row['title'], description=row.get('description') or '')
+                  for pk, (slug, row) in zip(self.allocate(Group, len(fresh)), fresh.items())]
+        Group.objects.bulk_create(groups)
+        self.groups.ids.update((group.slug, group.pk) for group in groups)
+        return len(groups)
+
+    def insert_posts(self, rows):
+        self.users.load(row['author'] for row in rows)
+        self.groups.load(row.get('group') for row in rows)
+        posts = []
+        for row in rows:
+            author_id = self.users.get(row['author'])
+            group_id = self.groups.get(row.get('group')) if row.get('group') else None
+            if author_id is None or (row.get('group') and group_id is None):
+                continue
+            posts.append(Post(text=row['text'], author_id=author_id, group_id=group_id,
+                              image=row.get('image') or None, pub_date=parse_date(row.get('pub_date'))))
+        for pk, post in zip(self.allocate(Post, len(posts)), posts):
+            post.pk = pk
+        Post.objects.bulk_create(posts)
+        if fulltext.available():
+            fulltext.insert_batch([(post.pk, fulltext.terms(post.text)) for post in posts])
+        self.post_authors.update(post.author_id for post in posts)
+        self.touched_users.update(self.post_authors)
+        return len(posts)
+
+    def insert_follows(self, rows):
+        self.users.load(name for row in rows for name in (row['user'], row['author']))
+        pairs = {(self.users.get(row['user']), self.users.get(row['author'])) for row in rows}
+        pairs = {(user_id, author_id) for user_id, author_id in pairs
+                 if user_id is not None and author_id is not None and user_id != author_id}
+        if pairs:
+            existing = Follow.objects.filter(user_id__in={user_id for user_id, _ in pairs},
+                                             author_id__in={author_id for _, author_id in pairs})
+            pairs -= set(existing.values_list('user_id', 'author_id'))
+        follows = [Follow(pk=pk, user_id=user_id, author_id=author_id)
+                   for pk, (user_id, author_id) in zip(self.allocate(Follow, len(pairs)), sorted(pairs))]
+        Follow.objects.bulk_create(follows)
+        self.touched_users.update(user_id for pair in pairs for user_id in pair)
+        return len(follows)
+
+    def finish(self):
+        """Производные данные, которые при обычном сохранении ведут сигналы."""
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [User, Group, Post, Follow]):
+                cursor.execute(sql)
+        touched = list(self.touched_users)
+        for start in range(0, len(touched), 500):
+            batch = touched[start:start + 500]
+            # счётчики пересчитаются лениво при первом обращении к автору
+            AuthorStats.objects.filter(pk__in=batch).delete()
+            cache.delete_many([recent_posts.cache_key(user_id) for user_id in batch])
+        if settings.FOLLOW_FEED_BACKEND == 'timeline':
+            # ленты собираются для всех подписчиков авторов с новыми записями
+            # и для новых подписок остальных авторов — один backfill на автора
+            for author_id in self.post_authors:
+                if timeline.is_fanout_author(author_id):
+                    for user_ids in timeline.follower_batches(author_id):
+                        timeline.backfill_followers(author_id, user_ids)
+            follows = (Follow.objects.filter(pk__gte=self.first_follow_id)
+                       .order_by('author_id').values_list('author_id', 'user_id'))
+            for author_id, pairs in groupby(follows.iterator(), key=itemgetter(0)):
+                if author_id not in self.post_authors and timeline.is_fanout_author(author_id):
+                    timeline.backfill_followers(author_id, [user_id for _, user_id in pairs])
+        page_cache.bump(('site',))
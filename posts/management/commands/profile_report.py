@@ -0,0 +1,92 @@
+import glob
+import json
+import os
+import pstats
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ('Сводка профилей, собранных ProfilingMiddleware: представления, самые дорогие SQL '
+            'и функции из профилей cProfile и стеков сэмплера.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dir', default=None, help='Каталог профилей, по умолчанию PROFILE_DIR')
+        parser.add_argument('--view', help='Только профили этого маршрута')
+        parser.add_argument('--limit', type=int, default=25, help='Сколько строк выводить в каждом разделе')
+        parser.add_argument('--sort', default='cumulative', choices=('cumulative', 'tottime', 'ncalls'),
+                            help='Порядок функций в профилях cProfile')
+
+    def handle(self, *args, **options):
+        directory = options['dir'] or settings.PROFILE_DIR
+        if not os.path.isdir(directory):
+            raise CommandError(f'Нет каталога профилей {directory}')
+        self.limit = options['limit']
+        profiles = []
+        for path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+            try:
+                with open(path, encoding='utf-8') as source:
+                    meta = json.load(source)
+            except (OSError, ValueError):
+                continue
+            data = f'{path[:-len(".json")]}.{meta.get("kind")}'
+            if os.path.exists(data) and (not options['view'] or meta.get('view') == options['view']):
+                profiles.append((data, meta))
+        if not profiles:
+            self.stdout.write('Профилей нет')
+            return
+        self.report_views(profiles)
+        self.report_queries(profiles)
+        cprofiles = [path for path, meta in profiles if meta['kind'] == 'prof']
+        if cprofiles:
+            self.stdout.write(f'\ncProfile, {len(cprofiles)} запросов:')
+            stats = pstats.Stats(*cprofiles, stream=self.stdout)
+            stats.strip_dirs().sort_stats(options['sort']).print_stats(self.limit)
+        samples = [path for path, meta in profiles if meta['kind'] == 'stacks']
+        if samples:
+            self.report_stacks(samples)
+
+    def report_views(self, profiles):
+        views = defaultdict(list)
+        for _, meta in profiles:
+            views[meta.get('view') or 'unresolved'].append(meta)
+        self.stdout.write(f'{"Представление":<24} {"профилей":>8} {"среднее мс":>11} {"макс мс":>9} {"SQL":>6}')
+        for view, metas in sorted(views.items(), key=lambda item: -sum(m['duration_ms'] for m in item[1])):
+            durations = [meta['duration_ms'] for meta in metas]
+            queries = sum(len(meta['queries']) for meta in metas) / len(metas)
+            self.stdout.write(f'{view:<24} {len(metas):>8} {sum(durations) / len(durations):>11.1f} '
+                              f'{max(durations):>9.1f} {queries:>6.1f}')
+
+    def report_queries(self, profiles):
+        totals = defaultdict(lambda: [0, 0.0])
+        for _, meta in profiles:
+            for query in meta['queries']:
+                total = totals[query['sql']]
+                total[0] += 1
+                total[1] += query['ms']
+        if not totals:
+            return
+        self.stdout.write('\nSQL по суммарному времени:')
+        for sql, (count, ms) in sorted(totals.items(), key=lambda item: -item[1][1])[:self.limit]:
+            self.stdout.write(f'{ms:>10.2f} мс {count:>6}×  {sql[:160]}')
+
+    def report_stacks(self, paths):
+        # собственное время — кадр на вершине стека, полное — кадр где-либо в стеке
+        own, inclusive = Counter(), Counter()
+        total = 0
+        for path in paths:
+            with open(path, encoding='utf-8') as source:
+                for line in source:
+                    stack, _, count = line.rstrip('\n').rpartition(' ')
+                    count = int(count)
+                    frames = stack.split(';')
+                    total += count
+                    own[frames[-1]] += count
+                    for frame in set(frames):
+                        inclusive[frame] += count
+        self.stdout.write(f'\nСтеки сэмплера, {len(paths)} запросов, {total} снимков:')
+        self.stdout.write(f'{"своё":>8} {"полное":>8}  функция')
+        for frame, count in own.most_common(self.limit):
+            self.stdout.write(f'{100 * count / total:>7.1f}% {100 * inclusive[frame] / total:>7.1f}%  {frame}')
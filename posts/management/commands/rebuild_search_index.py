@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import fulltext
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает полнотекстовый индекс записей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Сколько записей вставлять в индекс за одну транзакцию')
+
+    def handle(self, *args, **options):
+        if not fulltext.create_table():
+            raise CommandError('Полнотекстовый индекс доступен только на SQLite с FTS5')
+        rows = Post.objects.order_by('pk').values_list('id', 'text').iterator(chunk_size=options['batch_size'])
+        total = fulltext.rebuild(rows, options['batch_size'])
+        self.stdout.write(f'Проиндексировано записей: {total}')
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from posts import page_cache
+from posts.models import AuthorStats, Comment, Follow, Post
+
+
+def count_subquery(queryset, field):
+    counts = (queryset.filter(**{field: OuterRef('pk')}).order_by()
+              .values(field).annotate(total=Count('pk')).values('total'))
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает денормализованные счётчики и исправляет расхождения'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000,
+                            help='Сколько строк проверять за один запрос')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fixed = self.repair(Post, {'comments_count': count_subquery(Comment.objects, 'post')}, batch_size)
+        if fixed:
+            # счётчик комментариев выводится в карточках записей на всех страницах
+            page_cache.bump(('site',))
+        self.stdout.write(f'Post.comments_count: исправлено {fixed}')
+        fixed = self.repair(AuthorStats, {
+            'followers_count': count_subquery(Follow.objects, 'author'),
+            'following_count': count_subquery(Follow.objects, 'user'),
+            'posts_count': count_subquery(Post.objects, 'author'),
+        }, batch_size)
+        self.stdout.write(f'AuthorStats: исправлено {fixed}')
+
+    def repair(self, model, counters, batch_size):
+        """Сверяет счётчики с фактическими значениями диапазонами pk и обновляет только разошедшиеся строки."""
+        annotations = {f'actual_{field}': expression for field, expression in counters.items()}
+        drift = Q()
+        for field in counters:
+            drift |= ~Q(**{field: F(f'actual_{field}')})
+        fixed = 0
+        last_pk = 0
+        while True:
+            ids = list(model.objects.filter(pk__gt=last_pk).order_by('pk')
+                       .values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return fixed
+            last_pk = ids[-1]
+            drifted = list(model.objects.filter(pk__gte=ids[0], pk__lte=last_pk)
+                           .annotate(**annotations).filter(drift)
+                           .values_list('pk', flat=True))
+            if drifted:
+                fixed += model.objects.filter(pk__in=drifted).update(**counters)
@@ -0,0 +1,53 @@
+import os
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import slow_queries
+
+
+class Command(BaseCommand):
+    help = ('Сводка журнала медленных запросов по отпечаткам SQL: число, суммарное и максимальное время, '
+            'представления и план. Полные проходы по таблицам отмечаются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=None, help='Файл журнала, по умолчанию SLOW_QUERY_LOG')
+        parser.add_argument('--view', help='Только запросы этого маршрута')
+        parser.add_argument('--limit', type=int, default=20, help='Сколько отпечатков выводить')
+        parser.add_argument('--full-scans', action='store_true', help='Только запросы с полным проходом')
+
+    def handle(self, *args, **options):
+        path = options['log'] or settings.SLOW_QUERY_LOG
+        if not path or not os.path.exists(path):
+            raise CommandError(f'Нет журнала медленных запросов {path}')
+        groups = defaultdict(lambda: {'count': 0, 'ms': 0.0, 'max_ms': 0.0, 'views': Counter()})
+        for entry in slow_queries.read(path):
+            if options['view'] and entry['view'] != options['view']:
+                continue
+            if options['full_scans'] and not entry['full_scan']:
+                continue
+            group = groups[entry['fingerprint']]
+            group['count'] += 1
+            group['ms'] += entry['ms']
+            if entry['ms'] >= group['max_ms']:
+                # пример — самый медленный запрос отпечатка с его параметрами и планом
+                group.update(max_ms=entry['ms'], example=entry)
+            group['views'][entry['view'] or 'вне запроса'] += 1
+        if not groups:
+            self.stdout.write('Медленных запросов нет')
+            return
+        ordered = sorted(groups.items(), key=lambda item: -item[1]['ms'])
+        for number, (key, group) in enumerate(ordered[:options['limit']], 1):
+            example = group['example']
+            mark = ' ПОЛНЫЙ ПРОХОД' if example['full_scan'] else ''
+            self.stdout.write(f'{number}. {group["ms"]:.1f} мс всего, {group["count"]}×, '
+                              f'макс {group["max_ms"]:.1f} мс{mark}')
+            views = ', '.join(f'{view} ({count})' for view, count in group['views'].most_common())
+            self.stdout.write(f'   представления: {views}')
+            self.stdout.write(f'   {key}')
+            if example['params']:
+                self.stdout.write(f'   параметры: {", ".join(example["params"])[:200]}')
+            for line in example['plan']:
+                self.stdout.write(f'   | {line}')
+        self.stdout.write(f'Отпечатков: {len(groups)}, записей: {sum(g["count"] for g in groups.values())}')
@@ -0,0 +1,147 @@
+"""Отдача загруженных файлов и миниатюр из MEDIA_ROOT без DEBUG.
+
+Файл не читается в память: FileResponse передаёт его серверу через
+wsgi.file_wrapper (gunicorn и uWSGI отдают его os.sendfile), диапазоны Range
+отдаются с того же дескриптора. С MEDIA_SENDFILE_HEADER отдачу целиком берёт
+на себя фронтенд: nginx (X-Accel-Redirect) или Apache/lighttpd (X-Sendfile).
+"""
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotAllowed
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+
+# миниатюры sorl называются по хэшу исходника и параметров — содержимое под именем не меняется
+THUMBNAIL_PREFIX = 'cache/'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+UPLOAD_CACHE_CONTROL = 'public, max-age=86400'
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOCK_SIZE = 64 * 1024
+
+
+class FileRange:
+    """Файл, который читается только в пределах диапазона.
+
+    fileno() остаётся у исходного файла: file_wrapper сервера отдаёт sendfile
+    с текущей позиции ровно Content-Length байт.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """(start, length) одного диапазона Range, None — отдать файл целиком, ValueError — 416.
+
+    Несколько диапазонов сразу (multipart/byteranges) браузерам для картинок
+    не нужны — на такой заголовок отдаётся весь файл.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+        if start >= size or end < start:
+            raise ValueError(header)
+    else:
+        # bytes=-N — последние N байт
+        suffix = int(last)
+        if not suffix:
+            raise ValueError(header)
+        start, end = max(0, size - suffix), size - 1
+    return start, end - start + 1
+
+
+def if_range_matches(request, etag, mtime):
+    value = request.META.get('HTTP_IF_RANGE')
+    if not value:
+        return True
+    if value.startswith(('"', 'W/')):
+        return value == etag
+    return parse_http_date_safe(value) == int(mtime)
+
+
+def serve(request, path):
+    if request.method not in ('GET', 'HEAD'):
+        return HttpResponseNotAllowed(['GET', 'HEAD'])
+    try:
+        full_path = safe_join(settings.MEDIA_ROOT, path)
+    except SuspiciousFileOperation:
+        raise Http404
+    try:
+        stat = os.stat(full_path)
+    except OSError:
+        raise Http404
+    if not os.path.isfile(full_path):
+        raise Http404
+
+    etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+    response = get_conditional_response(request, etag=etag, last_modified=int(stat.st_mtime))
+    if response is None:
+        response = file_response(request, path, full_path, stat, etag)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = IMMUTABLE if path.startswith(THUMBNAIL_PREFIX) else UPLOAD_CACHE_CONTROL
+    return response
+
+
+def file_response(request, path, full_path, stat, etag):
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    header = settings.MEDIA_SENDFILE_HEADER
+    if header:
+        # тело и диапазоны отдаёт фронтенд, Django только проверил путь и условия
+        response = HttpResponse(content_type=content_type)
+        if header == 'X-Accel-Redirect':
+            response[header] = quote(settings.MEDIA_ACCEL_REDIRECT_PREFIX + path)
+        else:
+            response[header] = full_path
+        return response
+
+    try:
+        byte_range = parse_range(request.META.get('HTTP_RANGE', ''), stat.st_size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{stat.st_size}'
+        return response
+    if byte_range is not None and not if_range_matches(request, etag, stat.st_mtime):
+        byte_range = None
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=content_type)
+        response['Content-Length'] = stat.st_size
+    elif byte_range is None:
+        response = FileResponse(open(full_path, 'rb'), content_type=content_type)
+    else:
+        start, length = byte_range
+        response = FileResponse(FileRange(open(full_path, 'rb'), start, length), content_type=content_type,
+                                status=206)
+        response['Content-Range'] = f'bytes {start}-{start + length - 1}/{stat.st_size}'
+        response['Content-Length'] = length
+    if isinstance(response, FileResponse):
+        response.block_size = BLOCK_SIZE
+    response['Accept-Ranges'] = 'bytes'
+    return response
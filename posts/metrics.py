@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+
+# Границы корзин гистограмм в секундах
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+REGISTRY = {}
+_lock = threading.Lock()
+_state = {'pid': None, 'flushed': 0.0}
+
+
+def _check_fork():
+    # после fork ребёнок получает копию значений родителя — начинает с нуля и пишет в свой файл
+    pid = os.getpid()
+    if _state['pid'] != pid:
+        _state['pid'] = pid
+        _state['flushed'] = 0.0
+        for metric in REGISTRY.values():
+            metric.values = {}
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        REGISTRY[name] = self
+
+    def key(self, labels):
+        return json.dumps([str(labels[name]) for name in self.labelnames], ensure_ascii=False)
+
+    def labels(self, key, **extra):
+        return list(zip(self.labelnames, json.loads(key))) + list(extra.items())
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self.key(labels)
+        with _lock:
+            _check_fork()
+            self.values[key] = self.values.get(key, 0) + amount
+        flush()
+
+    @staticmethod
+    def merge(left, right):
+        return left + right
+
+    def samples(self, key, value):
+        yield self.name, self.labels(key), value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self.key(labels)
+        with _lock:
+            _check_fork()
+            # счётчики корзин (не накопленные), затем сумма и число наблюдений
+            state = self.values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            index = bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+        flush()
+
+    @staticmethod
+    def merge(left, right):
+        return [a + b for a, b in zip(left, right)]
+
+    def samples(self, key, value):
+        cumulative = 0
+        for bound, count in zip(self.buckets, value):
+            cumulative += count
+            yield self.name + '_bucket', self.labels(key, le=repr(bound)), cumulative
+        yield self.name + '_bucket', self.labels(key, le='+Inf'), value[-1]
+        yield self.name + '_sum', self.labels(key), value[-2]
+        yield self.name + '_count', self.labels(key), value[-1]
+
+
+def snapshot():
+    with _lock:
+        _check_fork()
+        return {name: dict(metric.values) for name, metric in REGISTRY.items() if metric.values}
+
+
+def process_file():
+    return os.path.join(settings.METRICS_DIR, f'metrics_{os.getpid()}.json')
+
+
+def flush(force=False):
+    """Сбрасывает значения процесса в METRICS_DIR не чаще раза в METRICS_FLUSH_INTERVAL секунд."""
+    if not settings.METRICS_DIR:
+        return
+    now = time.monotonic()
+    if not force and now - _state['flushed'] < settings.METRICS_FLUSH_INTERVAL:
+        return
+    _state['flushed'] = now
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    target = process_file()
+    # запись через временный файл: читатель не увидит половину JSON
+    temporary = f'{target}.{threading.get_ident()}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as output:
+        json.dump(snapshot(), output, ensure_ascii=False)
+    os.replace(temporary, target)
+
+
+def collect():
+    """Значения всех процессов: свои — из памяти, чужие — из файлов METRICS_DIR."""
+    merged = snapshot()
+    if not settings.METRICS_DIR or not os.path.isdir(settings.METRICS_DIR):
+        return merged
+    own = os.path.basename(process_file())
+    for entry in os.scandir(settings.METRICS_DIR):
+        if entry.name == own or not entry.name.endswith('.json'):
+            continue
+        try:
+            with open(entry.path, encoding='utf-8') as source:
+                values = json.load(source)
+        except (OSError, ValueError):
+            continue
+        for name, series in values.items():
+            metric = REGISTRY.get(name)
+            if metric is None:
+                continue
+            target = merged.setdefault(name, {})
+            for key, value in series.items():
+                target[key] = metric.merge(target[key], value) if key in target else value
+    return merged
+
+
+def escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def render(values):
+    lines = []
+    for name, metric in sorted(REGISTRY.items()):
+        lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        for key, value in sorted(values.get(name, {}).items()):
+            for sample, labels, number in metric.samples(key, value):
+                label_text = ','.join(f'{label}="{escape(text)}"' for label, text in labels)
+                lines.append(f'{sample}{{{label_text}}} {number}' if label_text else f'{sample} {number}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    if request.META.get('REMOTE_ADDR') not in settings.METRICS_ALLOWED_IPS:
+        raise Http404
+    return HttpResponse(render(collect()), content_type=CONTENT_TYPE)
+
+
+view_duration = Histogram('yatube_view_duration_seconds', 'Время ответа представления', ('view', 'method'))
+cache_requests = Counter('yatube_cache_requests_total', 'Обращения к кэшу карточек и страниц', ('cache', 'result'))
+thumbnail_duration = Histogram('yatube_thumbnail_duration_seconds', 'Построение всех миниатюр одного исходника',
+                               buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0))
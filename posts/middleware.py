@@ -0,0 +1,130 @@
+import cProfile
+import itertools
+import logging
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import metrics, profiling, slow_queries
+
+logger = logging.getLogger(__name__)
+
+
+class QueryStats:
+    """Обёртка execute_wrapper: считает запросы и суммарное время в базе."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class QueryStatsMiddleware:
+    """Число SQL-запросов и время в базе для каждого запроса — в заголовках и в логе.
+
+    Работает без DEBUG: запросы не копятся в connection.queries, а только считаются.
+    Для потоковых ответов учитываются запросы до начала отдачи тела.
+    Если задан SLOW_QUERY_MS, медленные запросы пишутся с планом в журнал posts.slow_queries.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = QueryStats()
+        wrappers = [stats]
+        if settings.SLOW_QUERY_MS is not None:
+            wrappers.append(slow_queries.SlowQueryLog(request))
+        with ExitStack() as stack:
+            for connection in connections.all():
+                for wrapper in wrappers:
+                    stack.enter_context(connection.execute_wrapper(wrapper))
+            response = self.get_response(request)
+        match = request.resolver_match
+        url_name = match.view_name if match else None
+        duration = round(stats.duration * 1000, 2)
+        if settings.QUERY_STATS_HEADERS:
+            response['X-DB-Queries'] = stats.count
+            response['X-DB-Time'] = f'{duration:.2f}'
+        budget = settings.QUERY_BUDGETS.get(url_name)
+        level = logging.WARNING if budget is not None and stats.count > budget else logging.INFO
+        logger.log(level, '%s %s: %d запросов, %.2f мс', request.method, url_name, stats.count, duration,
+                   extra={'url_name': url_name, 'db_queries': stats.count, 'db_time_ms': duration,
+                          'status': response.status_code, 'query_budget': budget})
+        return response
+
+
+class MetricsMiddleware:
+    """Гистограмма времени ответа по имени маршрута для /metrics."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        match = request.resolver_match
+        metrics.view_duration.observe(time.perf_counter() - started,
+                                      view=match.view_name if match else 'unresolved', method=request.method)
+        return response
+
+
+class ProfilingMiddleware:
+    """Профили запросов из продакшена в PROFILE_DIR, по умолчанию выключено.
+
+    Каждый PROFILE_SAMPLE_RATE-й запрос процесса идёт под cProfile. Если задан
+    PROFILE_SLOW_MS, остальные запросы дёшево сэмплируются фоновым потоком,
+    и стеки сохраняются только у тех, что оказались медленнее порога.
+    Рядом с профилем пишутся имя маршрута, время и журнал SQL.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILE_SAMPLE_RATE and settings.PROFILE_SLOW_MS is None:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.requests = itertools.count(1)
+
+    def __call__(self, request):
+        rate = settings.PROFILE_SAMPLE_RATE
+        sampled = bool(rate) and next(self.requests) % rate == 0
+        if not sampled and settings.PROFILE_SLOW_MS is None:
+            return self.get_response(request)
+        log = profiling.QueryLog()
+        profiler = cProfile.Profile() if sampled else None
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(log))
+            if sampled:
+                profiler.enable()
+                stack.callback(profiler.disable)
+            else:
+                stacks = profiling.sampler.register()
+                stack.callback(profiling.sampler.unregister)
+            response = self.get_response(request)
+        duration = round((time.perf_counter() - started) * 1000, 2)
+        if not sampled and (duration < settings.PROFILE_SLOW_MS or not stacks):
+            return response
+        match = request.resolver_match
+        url_name = match.view_name if match else None
+        meta = {'method': request.method, 'path': request.get_full_path(), 'status': response.status_code,
+                'duration_ms': duration, 'queries': log.queries}
+        try:
+            if sampled:
+                profiling.dump('prof', url_name, meta, profiler.dump_stats)
+            else:
+                profiling.dump('stacks', url_name, meta, profiling.write_stacks(stacks))
+        except OSError:
+            # профиль не должен ронять ответ: каталог мог исчезнуть или переполниться
+            logger.exception('Не удалось сохранить профиль %s', request.path)
+        return response
@@ -0,0 +1,25 @@
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    from posts import fulltext
+    if not fulltext.create_table(schema_editor):
+        return
+    Post = apps.get_model('posts', 'Post')
+    fulltext.rebuild(Post.objects.order_by('pk').values_list('id', 'text').iterator())
+
+
+def drop_index(apps, schema_editor):
+    from posts import fulltext
+    fulltext.drop_table(schema_editor)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0005_timelineentry'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -19,6 +19,15 @@ class Post(models.Model):
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='posts')
     group = models.ForeignKey(Group, on_delete=models.CASCADE, related_name='posts', blank=True, null=True)
     image = models.ImageField(upload_to='posts/', blank=True, null=True)
+    # поддерживается сигналами Comment, сверяется командой recount_counters
+    comments_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta:
+        # ключи keyset-пагинации лент автора и сообщества
+        indexes = [
+            models.Index(fields=['author', 'pub_date', 'id'], name='post_author_feed_idx'),
+            models.Index(fields=['group', 'pub_date', 'id'], name='post_group_feed_idx'),
+        ]
 
     def __str__(self):
         return self.text
@@ -38,5 +47,60 @@ class Follow(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='follower')
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='following')
 
+    class Meta:
+        indexes = [
+            # проверка «подписан ли» на страницах автора и записи — один поиск по индексу
+            models.Index(fields=['user', 'author'], name='follow_user_author_idx'),
+        ]
+
     def __str__(self):
         return f'follower-{self.user}->following-{self.author}'
+
+
+class AuthorStatsManager(models.Manager):
+
+    def recount(self, user):
+        user_id = getattr(user, 'pk', user)
+        stats, _ = self.update_or_create(user_id=user_id, defaults={
+            'followers_count': Follow.objects.filter(author_id=user_id).count(),
+            'following_count': Follow.objects.filter(user_id=user_id).count(),
+            'posts_count': Post.objects.filter(author_id=user_id).count(),
+        })
+        return stats
+
+    def for_user(self, user):
+        # строка создаётся лениво, при первом обращении к странице автора
+        stats = self.filter(pk=getattr(user, 'pk', user)).first()
+        if stats is None:
+            stats = self.recount(user)
+        return stats
+
+
+class AuthorStats(models.Model):
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    followers_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+    posts_count = models.PositiveIntegerField(default=0)
+
+    objects = AuthorStatsManager()
+
+    def __str__(self):
+        return f'stats-{self.user_id}'
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок: строка на пару (подписчик, запись)."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='timeline')
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='timeline_entries')
+    author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='+')
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('user', 'post')
+        indexes = [
+            models.Index(fields=['user', 'pub_date', 'post'], name='timeline_user_feed_idx'),
+            models.Index(fields=['user', 'author'], name='timeline_user_author_idx'),
+        ]
+
+    def __str__(self):
+        return f'timeline-{self.user_id}->post-{self.post_id}'
@@ -0,0 +1,159 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from . import metrics
+
+# Области видимости версий:
+#   ('site',)            — всё, что попадает на любую страницу (например, названия сообществ)
+#   ('global',)          — главная лента
+#   ('group', slug)      — лента сообщества
+#   ('author', username) — страница автора и его счётчики
+#   ('post', id)         — страница записи с комментариями
+
+# кэши, которые не видны другим процессам
+LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',)
+
+
+def version_key(scope):
+    return 'version:' + ':'.join(str(part) for part in scope)
+
+
+def shared_timeout(timeout):
+    """Таймаут ключа, который должен быть общим для всех воркеров.
+
+    Сдвиг версии в кэше одного процесса другие не увидят: там ключи живут
+    не дольше LOCAL_CACHE_TIMEOUT, и устаревшая страница (или ETag) держится
+    не дольше этого.
+    """
+    if settings.CACHES['default']['BACKEND'] not in LOCAL_BACKENDS:
+        return timeout
+    if timeout is None:
+        return settings.LOCAL_CACHE_TIMEOUT
+    return min(timeout, settings.LOCAL_CACHE_TIMEOUT)
+
+
+def get_versions(scopes):
+    """Текущие версии областей одним get_many; отсутствующие заводятся заново."""
+    keys = [version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() // 1000 for key in keys if key not in versions}
+    for key, value in missing.items():
+        # add не перетирает версию, которую успел завести соседний процесс
+        if not cache.add(key, value, shared_timeout(None)):
+            value = cache.get(key, value)
+        versions[key] = value
+    return [versions[key] for key in keys]
+
+
+def bump(*scopes):
+    """Инвалидирует страницы областей.
+
+    Версия — метка времени в микросекундах, поэтому новая всегда больше старой.
+    Внутри транзакции версия сдвигается ещё раз после фиксации: страница,
+    собранная соседним запросом до коммита, не останется под свежей версией.
+    """
+    keys = [version_key(scope) for scope in scopes]
+
+    def apply():
+        now = time.time_ns() // 1000
+        cache.set_many({key: now for key in keys}, shared_timeout(None))
+
+    apply()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(apply)
+
+
+def mark_incomplete(request):
+    """Отмечает страницу, на которой ещё нет части миниатюр.
+
+    Такая страница не кладётся в кэш и не получает ETag и Last-Modified:
+    миниатюры достраиваются без сдвига версий, и заглушки остались бы в кэше.
+    """
+    if request is not None:
+        request.page_incomplete = True
+
+
+def cache_anonymous_page(scopes_func):
+    """Кэширует страницу для анонимных GET-запросов под ключом из версий её областей.
+
+    scopes_func получает аргументы представления и возвращает список областей.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            scopes = [('site',)] + list(scopes_func(*args, **kwargs))
+            versions = getattr(request, 'page_versions', None) or get_versions(scopes)
+            raw = f'{request.get_full_path()}|{versions}'
+            key = 'page:' + hashlib.md5(raw.encode()).hexdigest()
+            cached = cache.get(key)
+            metrics.cache_requests.inc(cache='page', result='miss' if cached is None else 'hit')
+            if cached is not None:
+                content, content_type = cached
+                response = HttpResponse(content, content_type=content_type)
+                patch_vary_headers(response, ('Cookie',))
+                return response
+            response = view(request, *args, **kwargs)
+            if (response.status_code == 200 and not response.streaming and not response.cookies
+                    and not getattr(request, 'page_incomplete', False)):
+                cache.set(key, (response.content, response['Content-Type']),
+                          shared_timeout(settings.PAGE_CACHE_TIMEOUT))
+            patch_vary_headers(response, ('Cookie',))
+            return response
+        wrapper.page_scopes = scopes_func
+        return wrapper
+    return decorator
+
+
+def conditional_page(view):
+    """ETag и Last-Modified из версий областей страницы; 304 — до выборок и шаблонов.
+
+    Области берутся у представления, обёрнутого cache_anonymous_page. Версии
+    сдвигаются при любом изменении записей, комментариев и подписок, поэтому
+    запроса к базе за новейшей датой не нужно. Разметку для вошедшего
+    пользователя определяют ещё он сам и CSRF-токен в формах — они входят в ETag,
+    а Last-Modified, который их не различает, вошедшим не отдаётся.
+    """
+    scopes_func = view.page_scopes
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return view(request, *args, **kwargs)
+        versions = get_versions([('site',)] + list(scopes_func(*args, **kwargs)))
+        request.page_versions = versions
+        user_id = request.user.pk if request.user.is_authenticated else None
+        csrf = request.COOKIES.get(settings.CSRF_COOKIE_NAME, '')
+        raw = f'{request.get_full_path()}|{versions}|{user_id}|{csrf}'
+        etag = quote_etag(hashlib.md5(raw.encode()).hexdigest())
+        # Last-Modified точен до секунды: он отдаётся, только если эта секунда уже прошла,
+        # иначе следующее изменение в ту же секунду получило бы 304
+        last_modified = max(versions) // 1_000_000
+        if user_id or time.time() < last_modified + 1:
+            last_modified = None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        if not getattr(request, 'page_incomplete', False):
+            response['ETag'] = etag
+            if last_modified:
+                response['Last-Modified'] = http_date(last_modified)
+        # без no-cache браузер мог бы показывать страницу без перепроверки
+        if user_id:
+            patch_cache_control(response, no_cache=True, private=True)
+        else:
+            patch_cache_control(response, no_cache=True, public=True)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+    return wrapper
@@ -0,0 +1,131 @@
+import base64
+import binascii
+from datetime import datetime
+
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils import timezone
+
+# первичные ключи — 64-битные целые со знаком, больше база не примет
+MAX_PK = 2 ** 63 - 1
+
+# поля строк ленты: ключ пагинации и ключ карточки. Остальное загружает тег
+# post_cards только для карточек, которых нет в кэше; group_id читает post_init
+FEED_FIELDS = ('pub_date', 'author', 'group')
+
+
+def encode_cursor(post):
+    """Непрозрачный токен позиции в ленте по ключу (pub_date, id)."""
+    return encode_key(post.pub_date, post.pk)
+
+
+def encode_key(pub_date, pk):
+    raw = f'{pub_date.timestamp():.6f}:{pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """(pub_date, id) из токена или None, если токен испорчен или подделан."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        stamp, pk = raw.split(':')
+        # inf, nan и даты за пределами datetime дают OverflowError/OSError/ValueError
+        pub_date = datetime.fromtimestamp(float(stamp), tz=timezone.utc)
+        pk = int(pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError, OverflowError, OSError):
+        return None
+    if not 0 < pk <= MAX_PK:
+        return None
+    return pub_date, pk
+
+
+class CursorPage:
+    """Страница ленты без COUNT(*) и OFFSET.
+
+    Повторяет ту часть интерфейса django.core.paginator.Page,
+    которая нужна шаблонам.
+    """
+
+    def __init__(self, object_list, has_next, has_previous):
+        self.object_list = object_list
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def next_cursor(self):
+        if self._has_next and self.object_list:
+            return encode_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self._has_previous and self.object_list:
+            return encode_cursor(self.object_list[0])
+        return None
+
+
+class CursorPaginator:
+    """Keyset-пагинация по (pub_date, id): глубокие страницы стоят столько же, сколько первая."""
+
+    def __init__(self, queryset, per_page):
+        self.queryset = queryset
+        self.per_page = per_page
+
+    def page_after(self, cursor):
+        qs = self.queryset.order_by('-pub_date', '-id')
+        if cursor is not None:
+            pub_date, pk = cursor
+            qs = qs.filter(Q(pub_date__lt=pub_date) | Q(pub_date=pub_date, id__lt=pk))
+        rows = list(qs[:self.per_page + 1])
+        return CursorPage(rows[:self.per_page], len(rows) > self.per_page, cursor is not None)
+
+    def page_before(self, cursor):
+        pub_date, pk = cursor
+        qs = self.queryset.order_by('pub_date', 'id').filter(
+            Q(pub_date__gt=pub_date) | Q(pub_date=pub_date, id__gt=pk))
+        rows = list(qs[:self.per_page + 1])
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return CursorPage(rows, True, has_previous)
+
+
+def paginate(request, queryset, per_page, cursor_paginator=None):
+    """Страница для списка постов.
+
+    Первая страница и ?after=/?before= обслуживаются keyset-пагинацией без
+    COUNT(*) — CursorPaginator по queryset или переданным cursor_paginator;
+    обычный Paginator остаётся только для явного ?page=N.
+    Испорченный курсор даёт первую страницу. Возвращает пару (page, paginator).
+    """
+    if 'page' in request.GET:
+        paginator = Paginator(queryset.order_by('-pub_date', '-id'), per_page)
+        return paginator.get_page(request.GET.get('page')), paginator
+    paginator = cursor_paginator or CursorPaginator(queryset, per_page)
+    for param in ('after', 'before'):
+        cursor = decode_cursor(request.GET.get(param, ''))
+        if cursor is None:
+            continue
+        if param == 'after':
+            return paginator.page_after(cursor), paginator
+        return paginator.page_before(cursor), paginator
+    return paginator.page_after(None), paginator
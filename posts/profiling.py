@@ -0,0 +1,113 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from django.conf import settings
+
+# Сколько SQL-запросов одного запроса сохраняется рядом с профилем
+QUERY_LOG_LIMIT = 500
+
+
+class QueryLog:
+    """execute_wrapper, записывающий SQL и время каждого запроса."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if len(self.queries) < QUERY_LOG_LIMIT:
+                self.queries.append({'sql': sql, 'ms': round((time.perf_counter() - started) * 1000, 3)})
+
+
+class StackSampler:
+    """Один фоновый поток на процесс, снимающий стеки зарегистрированных потоков-запросов.
+
+    Стоимость для запроса — регистрация в словаре; стеки собираются в свёрнутом
+    формате («модуль:функция;…» → число снимков), пригодном для flame graph.
+    """
+
+    def __init__(self):
+        self.active = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run, name='stack-sampler', daemon=True)
+            self.thread.start()
+
+    def register(self):
+        self.start()
+        stacks = Counter()
+        with self.lock:
+            self.active[threading.get_ident()] = stacks
+        return stacks
+
+    def unregister(self):
+        with self.lock:
+            self.active.pop(threading.get_ident(), None)
+
+    def run(self):
+        while True:
+            time.sleep(settings.PROFILE_SAMPLE_INTERVAL)
+            with self.lock:
+                if not self.active:
+                    continue
+                frames = sys._current_frames()
+                for ident, stacks in self.active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stacks[collapse(frame)] += 1
+
+
+sampler = StackSampler()
+
+
+def collapse(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f'{frame.f_globals.get("__name__", "?")}:{code.co_name}:{code.co_firstlineno}')
+        frame = frame.f_back
+    return ';'.join(reversed(names))
+
+
+def dump(kind, url_name, meta, write):
+    """Сохраняет профиль и метаданные в PROFILE_DIR и удаляет самые старые файлы сверх PROFILE_KEEP.
+
+    write(path) пишет сам профиль; kind — расширение: prof (cProfile) или stacks (сэмплер).
+    """
+    os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    base = os.path.join(settings.PROFILE_DIR, f'{stamp}-{os.getpid()}-{url_name or "unresolved"}')
+    write(f'{base}.{kind}')
+    with open(f'{base}.json', 'w', encoding='utf-8') as target:
+        json.dump({'kind': kind, 'view': url_name, **meta}, target, ensure_ascii=False, indent=1)
+    rotate()
+
+
+def rotate():
+    names = sorted(name for name in os.listdir(settings.PROFILE_DIR) if name.endswith('.json'))
+    for name in names[:max(0, len(names) - settings.PROFILE_KEEP)]:
+        base = os.path.join(settings.PROFILE_DIR, name[:-len('.json')])
+        for suffix in ('.json', '.prof', '.stacks'):
+            try:
+                os.remove(base + suffix)
+            except FileNotFoundError:
+                pass
+
+
+def write_stacks(stacks):
+    def write(path):
+        with open(path, 'w', encoding='utf-8') as target:
+            for stack, count in stacks.most_common():
+                target.write(f'{stack} {count}\n')
+    return write
@@ -0,0 +1,77 @@
+import heapq
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Follow, Post
+from .page_cache import shared_timeout
+from .pagination import FEED_FIELDS, CursorPage, CursorPaginator, decode_cursor
+
+
+def cache_key(author_id):
+    return f'recent_posts:{author_id}'
+
+
+def refresh(author_id):
+    """Перечитывает последние записи автора: [(timestamp, id), ...] от новых к старым."""
+    rows = (Post.objects.filter(author_id=author_id).order_by('-pub_date', '-id')
+            .values_list('pub_date', 'id')[:settings.RECENT_POSTS_PER_AUTHOR])
+    recent = [(pub_date.timestamp(), pk) for pub_date, pk in rows]
+    # кольцо обновляет тот воркер, где вышла запись: в кэше процесса у остальных оно лишь истекает
+    cache.set(cache_key(author_id), recent, shared_timeout(settings.RECENT_POSTS_TIMEOUT))
+    return recent
+
+
+def recent_for_authors(author_ids):
+    cached = cache.get_many([cache_key(author_id) for author_id in author_ids])
+    return {author_id: cached[cache_key(author_id)] if cache_key(author_id) in cached else refresh(author_id)
+            for author_id in author_ids}
+
+
+def horizon(lists):
+    """Самый новый ключ, старше которого данные в кольцах могут быть неполными."""
+    full = [recent[-1] for recent in lists if len(recent) >= settings.RECENT_POSTS_PER_AUTHOR]
+    return max(full) if full else None
+
+
+def merged_page(request, user, per_page):
+    """Страница ленты подписок k-way слиянием колец последних записей авторов.
+
+    Если страница уходит глубже, чем хранят кольца, отдаёт keyset-страницу из базы.
+    Возвращает пару (page, paginator), как posts.pagination.paginate.
+    """
+    author_ids = list(Follow.objects.filter(user=user).values_list('author_id', flat=True))
+    lists = list(recent_for_authors(author_ids).values())
+    limit = horizon(lists)
+    merged = heapq.merge(*lists, reverse=True)
+
+    before = decode_cursor(request.GET.get('before', ''))
+    after = decode_cursor(request.GET.get('after', ''))
+    if before is not None:
+        key = (before[0].timestamp(), before[1])
+        # нужны per_page + 1 ближайших к курсору записей новее него
+        window = deque((item for item in merged if item > key), maxlen=per_page + 1)
+        keys = list(window)
+        has_previous = len(keys) > per_page
+        keys = keys[-per_page:]
+        has_next = True
+    else:
+        if after is not None:
+            key = (after[0].timestamp(), after[1])
+            merged = (item for item in merged if item < key)
+        keys = [item for _, item in zip(range(per_page + 1), merged)]
+        has_next = len(keys) > per_page
+        keys = keys[:per_page]
+        has_previous = after is not None
+
+    if limit is not None and (not keys or keys[-1] < limit or not has_next):
+        paginator = CursorPaginator(
+            Post.objects.only(*FEED_FIELDS).filter(author_id__in=author_ids), per_page)
+        if before is not None:
+            return paginator.page_before(before), paginator
+        return paginator.page_after(after), paginator
+
+    posts = Post.objects.only(*FEED_FIELDS).in_bulk([pk for _, pk in keys])
+    object_list = [posts[pk] for _, pk in keys if pk in posts]
+    return CursorPage(object_list, has_next, has_previous), None
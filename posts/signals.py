@@ -0,0 +1,156 @@
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import fulltext, page_cache, recent_posts, timeline
+from .models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+def bump_stats(user_id, field, delta):
+    # нет строки — не страшно: AuthorStats.objects.for_user пересчитает её при чтении
+    # разошедшийся счётчик не уходит ниже нуля, его поправит recount_counters
+    AuthorStats.objects.filter(pk=user_id).update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def bump_post_pages(post, group_ids=()):
+    group_ids = {group_id for group_id in (post.group_id, *group_ids) if group_id is not None}
+    slugs = Group.objects.filter(pk__in=group_ids).values_list('slug', flat=True) if group_ids else []
+    page_cache.bump(('global',), ('author', post.author.username), ('post', post.pk),
+                    *[('group', slug) for slug in slugs])
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    # при переносе записи в другое сообщество сбрасываются страницы обоих
+    instance._initial_group_id = instance.group_id
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    # loaddata приносит счётчики вместе с данными
+    if created and not raw:
+        Post.objects.filter(pk=instance.post_id).update(comments_count=F('comments_count') + 1)
+    if not raw:
+        bump_post_pages(instance.post)
+
+
+_local = threading.local()
+
+
+@contextmanager
+def bulk_deletes():
+    """Удаления записей и комментариев внутри блока проходят мимо обработчиков ниже.
+
+    Для массовых операций: счётчики, индекс и кэш вызывающий код поправляет сам,
+    один раз на всю выборку. Действует только в текущем потоке.
+    """
+    _local.bulk = True
+    try:
+        yield
+    finally:
+        _local.bulk = False
+
+
+def in_bulk_delete():
+    return getattr(_local, 'bulk', False)
+
+
+# id записей, которые удаляются вместе с комментариями: Collector шлёт все pre_delete
+# до удаления, поэтому комментарии удаляемой записи видят её здесь
+deleting_posts = set()
+
+
+@receiver(pre_delete, sender=Post)
+def post_deleting(sender, instance, **kwargs):
+    if in_bulk_delete():
+        return
+    deleting_posts.add(instance.pk)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    # счётчик и страницы удаляемой записи не нужны: страницы сбросит post_deleted один раз
+    if in_bulk_delete() or instance.post_id in deleting_posts:
+        return
+    Post.objects.filter(pk=instance.post_id, comments_count__gt=0).update(
+        comments_count=F('comments_count') - 1)
+    bump_post_pages(instance.post)
+
+
+@receiver(post_save, sender=Post)
+def post_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        bump_stats(instance.author_id, 'posts_count', 1)
+        if settings.FOLLOW_FEED_BACKEND == 'timeline':
+            timeline.fan_out(instance)
+        elif settings.FOLLOW_FEED_BACKEND == 'recent':
+            recent_posts.refresh(instance.author_id)
+    # loaddata тоже пополняет индекс: таблицы FTS нет в фикстурах
+    fulltext.index(instance.pk, instance.text)
+    if not raw:
+        bump_post_pages(instance, [instance._initial_group_id])
+        instance._initial_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    if in_bulk_delete():
+        return
+    deleting_posts.discard(instance.pk)
+    bump_stats(instance.author_id, 'posts_count', -1)
+    if settings.FOLLOW_FEED_BACKEND == 'recent':
+        recent_posts.refresh(instance.author_id)
+    fulltext.unindex(instance.pk)
+    bump_post_pages(instance, [instance._initial_group_id])
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        bump_stats(instance.author_id, 'followers_count', 1)
+        bump_stats(instance.user_id, 'following_count', 1)
+        if settings.FOLLOW_FEED_BACKEND == 'timeline':
+            timeline.backfill(instance)
+            timeline.rebalance(instance.author_id, 1)
+        page_cache.bump(('author', instance.author.username), ('author', instance.user.username))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    bump_stats(instance.author_id, 'followers_count', -1)
+    bump_stats(instance.user_id, 'following_count', -1)
+    timeline.cleanup(instance)
+    if settings.FOLLOW_FEED_BACKEND == 'timeline':
+        timeline.rebalance(instance.author_id, -1)
+    page_cache.bump(('author', instance.author.username), ('author', instance.user.username))
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def group_changed(sender, **kwargs):
+    page_cache.bump(('site',))
+
+
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    # без обращения к полю: при only()/defer() оно стоило бы запроса
+    instance._initial_username = instance.__dict__.get('username')
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, update_fields=None, **kwargs):
+    # вход пользователя обновляет только last_login — страницы от этого не меняются
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    scopes = [('author', instance.username)]
+    old_username = instance._initial_username
+    if old_username and old_username != instance.username:
+        # имя автора есть в карточках и комментариях на всех страницах
+        scopes += [('site',), ('author', old_username)]
+    page_cache.bump(*scopes)
+    instance._initial_username = instance.username
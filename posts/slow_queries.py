@@ -0,0 +1,145 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# сколько разных отпечатков помнит процесс вместе с их планами
+PLAN_CACHE_SIZE = 1000
+_plans = {}
+_lock = threading.Lock()
+
+_literals = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    # списки IN разной длины — один и тот же запрос
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+def fingerprint(sql):
+    """SQL без литералов и параметров: запросы, различающиеся только значениями, совпадают."""
+    for pattern, replacement in _literals:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def explain_prefix(vendor):
+    return 'EXPLAIN QUERY PLAN ' if vendor == 'sqlite' else 'EXPLAIN '
+
+
+def is_full_scan(plan):
+    """Есть ли в плане полный проход по таблице без индекса."""
+    for line in plan:
+        line = line.strip()
+        if line.startswith('SCAN ') and ' USING ' not in line:
+            return True
+        if 'Seq Scan' in line or 'type: ALL' in line:
+            return True
+    return False
+
+
+def plan_lines(vendor, rows):
+    if vendor == 'sqlite':
+        # (id, parent, notused, detail) — вложенность передаётся отступом
+        depth = {0: -1}
+        lines = []
+        for node, parent, _, detail in rows:
+            depth[node] = depth.get(parent, -1) + 1
+            lines.append('  ' * depth[node] + detail)
+        return lines
+    return [' '.join(str(value) for value in row) for row in rows]
+
+
+class SlowQueryLog:
+    """execute_wrapper: запросы дольше SLOW_QUERY_MS с планом, параметрами и маршрутом.
+
+    План снимается один раз на отпечаток в процессе, на том же соединении;
+    собственные EXPLAIN обёртка пропускает.
+    """
+
+    def __init__(self, request=None):
+        self.request = request
+        self.explaining = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if self.explaining:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - started) * 1000
+            if duration >= settings.SLOW_QUERY_MS:
+                self.record(sql, params, many, duration, context['connection'])
+
+    def view_name(self):
+        match = getattr(self.request, 'resolver_match', None)
+        return match.view_name if match else None
+
+    def explain(self, sql, params, connection):
+        key = fingerprint(sql)
+        with _lock:
+            if key in _plans:
+                return _plans[key]
+        plan = []
+        if sql.lstrip()[:6].upper() == 'SELECT':
+            self.explaining = True
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(explain_prefix(connection.vendor) + sql, params)
+                    plan = plan_lines(connection.vendor, cursor.fetchall())
+            except Exception as error:
+                # например, прерванная транзакция PostgreSQL — запись остаётся без плана
+                plan = [f'EXPLAIN не выполнен: {error}']
+            finally:
+                self.explaining = False
+        with _lock:
+            if len(_plans) >= PLAN_CACHE_SIZE:
+                _plans.pop(next(iter(_plans)))
+            _plans[key] = plan
+        return plan
+
+    def record(self, sql, params, many, duration, connection):
+        plan = [] if many else self.explain(sql, params, connection)
+        entry = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'view': self.view_name(),
+            'ms': round(duration, 3),
+            'fingerprint': fingerprint(sql),
+            'sql': sql,
+            'params': [str(value) for value in params] if params and not many else [],
+            'plan': plan,
+            'full_scan': is_full_scan(plan),
+        }
+        logger.warning('%s: медленный запрос %.1f мс%s: %s', entry['view'], duration,
+                       ' (полный проход)' if entry['full_scan'] else '', sql, extra={'slow_query': entry})
+        if settings.SLOW_QUERY_LOG:
+            write(entry)
+
+
+def write(entry):
+    # одна строка JSON за один write: строки нескольких процессов не перемешиваются
+    directory = os.path.dirname(settings.SLOW_QUERY_LOG)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(settings.SLOW_QUERY_LOG, 'a', encoding='utf-8') as target:
+        target.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+def read(path):
+    with open(path, encoding='utf-8') as source:
+        for line in source:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
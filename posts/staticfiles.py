@@ -0,0 +1,184 @@
+"""Статика без DEBUG: хэши в именах, сжатие при collectstatic и отдача на уровне WSGI.
+
+collectstatic через CompressedManifestStaticFilesStorage кладёт рядом с каждым
+текстовым файлом .gz (и .br, если установлен модуль brotli). StaticFilesHandler
+оборачивает WSGI-приложение в yatube/wsgi.py: один раз читает STATIC_ROOT и
+отдаёт файлы до Django, выбирая вариант по Accept-Encoding. Файлы с хэшем
+в имени кэшируются навсегда.
+"""
+import gzip
+import json
+import logging
+import mimetypes
+import os
+import re
+from email.utils import formatdate
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE = ('.css', '.js', '.map', '.svg', '.txt', '.html', '.json', '.xml', '.ico', '.eot', '.ttf')
+# сжатый вариант хранится, только если заметно меньше исходного
+MIN_RATIO = 0.95
+IMMUTABLE = 'public, max-age=31536000, immutable'
+MUTABLE = 'public, max-age=60'
+FILE_CHUNK_SIZE = 64 * 1024
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Хэширующее хранилище, которое после collectstatic сжимает текстовые файлы.
+
+    Пока манифеста нет (collectstatic не запускался, тесты), ссылки строятся
+    на исходные имена, а не падают с ошибкой; без DEBUG об этом предупреждает лог.
+    """
+    missing_manifest_logged = False
+
+    def url(self, name, force=False):
+        if not self.hashed_files:
+            if not settings.DEBUG and not self.missing_manifest_logged:
+                logger.warning('Нет манифеста статики в %s: ссылки ведут на имена без хэша и не кэшируются '
+                               'надолго. Запустите collectstatic', self.location)
+                self.missing_manifest_logged = True
+            return self._url(lambda clean_name: clean_name, name, force)
+        return super().url(name, force)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        if brotli is None:
+            logger.warning('Модуль brotli не установлен: рядом со статикой сохраняются только .gz')
+        names = set(paths) | set(self.hashed_files.values())
+        for name in sorted(names):
+            if name.endswith(COMPRESSIBLE) and self.exists(name):
+                compress(self.path(name))
+
+
+def compress(path):
+    with open(path, 'rb') as source:
+        data = source.read()
+    # mtime=0: одинаковый файл даёт одинаковый архив, сборки воспроизводимы
+    variants = [('.gz', gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.append(('.br', brotli.compress(data)))
+    for suffix, compressed in variants:
+        if len(compressed) < len(data) * MIN_RATIO:
+            with open(path + suffix, 'wb') as target:
+                target.write(compressed)
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding с ненулевым q."""
+    accepted = set()
+    for part in header.split(','):
+        token, _, params = part.strip().partition(';')
+        match = re.search(r'q=([0-9.]+)', params)
+        if not match or float(match.group(1)) > 0:
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+class StaticFile:
+
+    def __init__(self, path, immutable):
+        stat = os.stat(path)
+        self.content_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if self.content_type.startswith('text/') or self.content_type == 'application/javascript':
+            self.content_type += '; charset=utf-8'
+        self.cache_control = IMMUTABLE if immutable else MUTABLE
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.variants = {None: (path, stat.st_size)}
+        for encoding, suffix in ENCODINGS:
+            if os.path.exists(path + suffix):
+                self.variants[encoding] = (path + suffix, os.path.getsize(path + suffix))
+        self.etag_base = f'{stat.st_size:x}-{int(stat.st_mtime):x}'
+
+    def choose(self, accept_encoding):
+        accepted = accepted_encodings(accept_encoding) if len(self.variants) > 1 else set()
+        for encoding, _ in ENCODINGS:
+            if encoding in self.variants and encoding in accepted:
+                return encoding
+        return None
+
+
+def scan(root, url_prefix):
+    """url → StaticFile для всех файлов STATIC_ROOT; сжатые копии — варианты исходных."""
+    try:
+        with open(os.path.join(root, 'staticfiles.json'), encoding='utf-8') as manifest:
+            hashed = set(json.load(manifest).get('paths', {}).values())
+    except (OSError, ValueError):
+        hashed = set()
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.endswith(('.gz', '.br')) and os.path.exists(os.path.join(directory, name[:-3])):
+                continue
+            path = os.path.join(directory, name)
+            relative = os.path.relpath(path, root).replace(os.sep, '/')
+            files[url_prefix + relative] = StaticFile(path, relative in hashed)
+    return files
+
+
+class StaticFilesHandler:
+    """WSGI-обёртка, отдающая STATIC_ROOT без участия Django.
+
+    Содержимое каталога читается при запуске процесса — после collectstatic
+    воркеры нужно перезапустить, как и при обновлении кода.
+    """
+
+    def __init__(self, application, root=None, url_prefix=None):
+        self.application = application
+        root = root or settings.STATIC_ROOT
+        self.prefix = url_prefix or settings.STATIC_URL
+        self.files = scan(root, self.prefix) if root and os.path.isdir(root) else {}
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if not path.startswith(self.prefix):
+            return self.application(environ, start_response)
+        static = self.files.get(path)
+        if static is None or environ['REQUEST_METHOD'] not in ('GET', 'HEAD'):
+            return self.application(environ, start_response)
+        return self.serve(static, environ, start_response)
+
+    def serve(self, static, environ, start_response):
+        encoding = static.choose(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        file_path, size = static.variants[encoding]
+        etag = f'"{static.etag_base}{"-" + encoding if encoding else ""}"'
+        headers = [
+            ('Cache-Control', static.cache_control),
+            ('ETag', etag),
+            ('Last-Modified', static.last_modified),
+        ]
+        if len(static.variants) > 1:
+            headers.append(('Vary', 'Accept-Encoding'))
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH', '')
+        if etag in if_none_match or if_none_match.strip() == '*':
+            start_response('304 Not Modified', headers)
+            return []
+        headers += [('Content-Type', static.content_type), ('Content-Length', str(size))]
+        if encoding:
+            headers.append(('Content-Encoding', encoding))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        source = open(file_path, 'rb')
+        file_wrapper = environ.get('wsgi.file_wrapper')
+        if file_wrapper is not None:
+            # сервер может отдать файл через sendfile
+            return file_wrapper(source, FILE_CHUNK_SIZE)
+        return read_chunks(source)
+
+
+def read_chunks(source):
+    with source:
+        for chunk in iter(lambda: source.read(FILE_CHUNK_SIZE), b''):
+            yield chunk
@@ -0,0 +1,56 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from posts import metrics, page_cache, thumbnails
+from posts.models import Post
+
+register = template.Library()
+
+
+def card_keys(posts, user):
+    """Ключи карточек из версий page_cache: записи, сайта и того, видит ли зритель ссылку «Редактировать».
+
+    Версия записи сдвигается при её изменении и при комментариях, версия
+    сайта — при переименовании сообществ и авторов, поэтому поля записей
+    для ключей не нужны.
+    """
+    versions = page_cache.get_versions([('site',)] + [('post', post.pk) for post in posts])
+    site = versions[0]
+    return [f'post_card:{post.pk}:{version}:{site}:{int(user is not None and user.pk == post.author_id)}'
+            for post, version in zip(posts, versions[1:])]
+
+
+@register.simple_tag(takes_context=True)
+def post_cards(context, posts):
+    """Готовые карточки записей страницы.
+
+    Кэш читается одним get_many, полные строки загружаются и рендерятся только
+    для промахов; миниатюры для них разрешаются одним пакетным запросом.
+    Карточка, для которой построены ещё не все миниатюры, в кэш не кладётся.
+    """
+    user = context.get('user')
+    posts = list(posts)
+    keys = card_keys(posts, user)
+    cards = cache.get_many(keys)
+    missed = {post.pk: key for key, post in zip(keys, posts) if key not in cards}
+    if keys:
+        metrics.cache_requests.inc(len(keys) - len(missed), cache='card', result='hit')
+        metrics.cache_requests.inc(len(missed), cache='card', result='miss')
+    full = Post.objects.select_related('author', 'group').in_bulk(list(missed)) if missed else {}
+    resolved = thumbnails.resolve([post.image.name for post in full.values() if post.image])
+    ready = {}
+    for pk, post in full.items():
+        key = missed[pk]
+        thumbnail = resolved.get(post.image.name) if post.image else None
+        cards[key] = render_to_string('post_item.html', {'post': post, 'user': user, 'thumbnail': thumbnail})
+        if not post.image or thumbnail and thumbnail['complete']:
+            ready[key] = cards[key]
+        else:
+            page_cache.mark_incomplete(context.get('request'))
+    if ready:
+        cache.set_many(ready, settings.POST_CARD_TIMEOUT)
+    # запись, удалённая между выборкой страницы и карточек, пропускается
+    return [mark_safe(cards[key]) for key in keys if key in cards]
@@ -1,6 +1,6 @@
 from django.conf import settings
 from django.test import TestCase, Client, override_settings
-from time import sleep
+from django.core.cache import cache
 
 from posts.models import User, Group, Follow, Comment
 
@@ -107,6 +107,7 @@ class ErrorsTest(TestCase):
         self.assertEqual(response.status_code, 404, msg='Server does not return 404 error')
 
 
+@override_settings(THUMBNAIL_WORKERS=0)
 class ImagesTest(TestCase):
     def setUp(self):
         self.client = Client()
@@ -146,18 +147,19 @@ class ImagesTest(TestCase):
 
 class CacheTest(TestCase):
     def setUp(self):
+        cache.clear()
         self.client = Client()
+        self.anonymous = Client()
         self.user = User.objects.create_user(username='testuser', password='testpass')
         self.client.login(username='testuser', password='testpass')
-        self.client.get('/')
         self.text = 'Проверка добавления поста'
-        self.client.post('/new/', {'text': self.text})
 
     def test_cache(self):
-        response = self.client.get('/')
-        self.assertNotContains(response, self.text, status_code=200, msg_prefix='')
-        sleep(20)
-        response = self.client.get('/')
+        self.anonymous.get('/')
+        response = self.anonymous.get('/')
+        self.assertIsNone(response.context, msg='Anonymous index page is not served from cache')
+        self.client.post('/new/', {'text': self.text})
+        response = self.anonymous.get('/')
         self.assertContains(response, self.text, count=1, status_code=200, msg_prefix='')
 
 
@@ -0,0 +1,177 @@
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.conf import settings
+from django.core.cache import cache
+from sorl.thumbnail import default, get_thumbnail
+from sorl.thumbnail.conf import defaults as sorl_defaults, settings as sorl_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# Основная миниатюра карточки (src у <img>) — прежний JPEG 960x480
+CARD_SPEC = ('960x480', {'crop': 'center', 'upscale': True})
+# Варианты для srcset: (ширина, формат). Крупнее исходника не растягиваются.
+VARIANT_WIDTHS = (480, 960, 1440)
+VARIANT_FORMATS = ('WEBP', 'JPEG')
+VARIANTS = [(width, image_format, (f'{width}x{width // 2}', {'crop': 'center', 'upscale': False,
+                                                             'format': image_format}))
+            for width in VARIANT_WIDTHS for image_format in VARIANT_FORMATS]
+# Все миниатюры, которые выводит post_item.html: (геометрия, опции sorl)
+SPECS = [CARD_SPEC] + [spec for _, _, spec in VARIANTS]
+
+# Сколько не пытаться снова строить миниатюры исходника, на котором построение упало, секунды
+FAILED_TIMEOUT = 60 * 60
+
+_executor = None
+
+
+def init_worker():
+    import django
+    django.setup()
+
+
+def failed_key(name):
+    return f'thumbnail_failed:{name}'
+
+
+def generate(name):
+    """Строит все миниатюры исходника; уже существующие sorl находит в KV-хранилище."""
+    started = time.perf_counter()
+    try:
+        for geometry, options in SPECS:
+            get_thumbnail(name, geometry, **options)
+        # пропавший или нечитаемый исходник sorl только пишет в лог и в KV-хранилище не записывает
+        if default.kvstore.get(thumbnail_file(name, *CARD_SPEC)) is None:
+            raise OSError(f'Исходник {name} не читается')
+    except Exception:
+        # битый или пропавший исходник не ставится в очередь снова, а его карточка не ждёт миниатюр
+        cache.set(failed_key(name), True, FAILED_TIMEOUT)
+        raise
+    metrics.thumbnail_duration.observe(time.perf_counter() - started)
+    # воркер пула живёт долго и может не дождаться следующего сброса
+    metrics.flush(force=True)
+    return name
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        # spawn: дочерний процесс не наследует соединения с базой родителя
+        _executor = ProcessPoolExecutor(max_workers=settings.THUMBNAIL_WORKERS,
+                                        mp_context=multiprocessing.get_context('spawn'),
+                                        initializer=init_worker)
+    return _executor
+
+
+def reset_executor():
+    global _executor
+    broken, _executor = _executor, None
+    if broken is not None:
+        broken.shutdown(wait=False)
+
+
+def log_failure(future):
+    if future.exception() is not None:
+        logger.error('Не удалось построить миниатюры', exc_info=future.exception())
+
+
+def schedule(name):
+    """Ставит построение миниатюр в пул процессов; при THUMBNAIL_WORKERS = 0 строит сразу."""
+    # один и тот же исходник не ставится в очередь повторно, пока задача не отработала
+    if not cache.add(f'thumbnail_queued:{name}', True, 5 * 60):
+        return
+    if not settings.THUMBNAIL_WORKERS:
+        # как и тег {% thumbnail %}, битый исходник не должен ронять страницу
+        try:
+            generate(name)
+        except Exception:
+            logger.exception('Не удалось построить миниатюры для %s', name)
+        return
+    try:
+        future = executor().submit(generate, name)
+    except (BrokenProcessPool, RuntimeError):
+        # воркер пула убит (например, OOM) или пул остановлен: следующая задача заведёт новый,
+        # а миниатюры построятся при следующем показе карточки
+        reset_executor()
+        cache.delete(f'thumbnail_queued:{name}')
+        logger.exception('Пул миниатюр недоступен, %s построится позже', name)
+        return
+    future.add_done_callback(log_failure)
+
+
+def thumbnail_file(name, geometry, options):
+    """Файл миниатюры, который построил бы sorl.thumbnail.get_thumbnail, без обращения к хранилищу."""
+    backend = default.backend
+    source = ImageFile(name)
+    options = dict(options)
+    if sorl_settings.THUMBNAIL_PRESERVE_FORMAT:
+        options.setdefault('format', backend._get_format(source))
+    for key, value in backend.default_options.items():
+        options.setdefault(key, value)
+    for key, attr in backend.extra_options:
+        value = getattr(sorl_settings, attr)
+        if value != getattr(sorl_defaults, attr):
+            options.setdefault(key, value)
+    return ImageFile(backend._get_thumbnail_filename(source, geometry, options), default.storage)
+
+
+def lookup(keys):
+    """Значения KV-хранилища sorl по ключам: один get_many в кэш и один запрос к базе на промахи."""
+    kv_cache = default.kvstore.cache
+    found = kv_cache.get_many(keys)
+    found = {key: value for key, value in found.items() if isinstance(value, str)}
+    missing = [key for key in keys if key not in found]
+    if missing:
+        stored = dict(KVStore.objects.filter(key__in=missing).values_list('key', 'value'))
+        if stored:
+            kv_cache.set_many(stored, sorl_settings.THUMBNAIL_CACHE_TIMEOUT)
+        found.update(stored)
+    return found
+
+
+def resolve(names):
+    """Миниатюры карточек для списка исходников страницы.
+
+    Возвращает {исходник: {'src': URL, 'webp': srcset, 'jpeg': srcset, 'complete': bool}}
+    для исходников с готовой основной миниатюрой или с упавшим построением
+    (src = None, complete = True: ждать нечего). Все ключи страницы читаются
+    одним пакетным запросом; недостающие миниатюры ставятся в очередь
+    на построение — KV-хранилище sorl помнит построенные, повторно они не строятся.
+    """
+    files = {name: [thumbnail_file(name, *spec) for spec in SPECS] for name in set(names)}
+    found = lookup([add_prefix(image_file.key) for image_files in files.values() for image_file in image_files])
+    ready = {name: [found.get(add_prefix(image_file.key)) for image_file in image_files]
+             for name, image_files in files.items()}
+    pending = [name for name, values in ready.items() if not all(values)]
+    for name in pending:
+        schedule(name)
+    # после schedule: при построении в запросе ошибка видна сразу
+    failed = cache.get_many([failed_key(name) for name in pending]) if pending else {}
+    resolved = {}
+    for name, values in ready.items():
+        if failed_key(name) in failed and values[0] is None:
+            resolved[name] = {'src': None, 'webp': '', 'jpeg': '', 'complete': True}
+            continue
+        if values[0] is None:
+            continue
+        srcsets = {'WEBP': {}, 'JPEG': {}}
+        for (_, image_format, _), value in zip(VARIANTS, values[1:]):
+            if value is not None:
+                image_file = deserialize_image_file(value)
+                # ширина маленьких исходников меньше заявленной — srcset должен знать настоящую
+                srcsets[image_format].setdefault(image_file.width, image_file.url)
+        resolved[name] = {
+            'src': deserialize_image_file(values[0]).url,
+            'webp': ', '.join(f'{url} {width}w' for width, url in sorted(srcsets['WEBP'].items())),
+            'jpeg': ', '.join(f'{url} {width}w' for width, url in sorted(srcsets['JPEG'].items())),
+            'complete': all(values) or failed_key(name) in failed,
+        }
+    return resolved
@@ -0,0 +1,157 @@
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .models import AuthorStats, Follow, Post, TimelineEntry
+from .pagination import CursorPage
+
+BATCH_SIZE = 1000
+
+
+def is_fanout_author(author_id):
+    """Раскладывать ли записи автора по лентам подписчиков при публикации."""
+    return AuthorStats.objects.for_user(author_id).followers_count <= settings.TIMELINE_FANOUT_LIMIT
+
+
+def fan_out(post):
+    if not is_fanout_author(post.author_id):
+        return
+    followers = Follow.objects.filter(author_id=post.author_id).values_list('user_id', flat=True)
+    batch = []
+    for user_id in followers.iterator():
+        batch.append(TimelineEntry(user_id=user_id, post=post, author_id=post.author_id, pub_date=post.pub_date))
+        if len(batch) >= BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def backfill(follow):
+    if not is_fanout_author(follow.author_id):
+        return
+    backfill_followers(follow.author_id, [follow.user_id])
+
+
+def backfill_followers(author_id, user_ids):
+    posts = list(Post.objects.filter(author_id=author_id).order_by('-pub_date', '-id')
+                 .values_list('id', 'pub_date')[:settings.TIMELINE_BACKFILL])
+    batch = []
+    for user_id in user_ids:
+        batch += [TimelineEntry(user_id=user_id, post_id=post_id, author_id=author_id, pub_date=pub_date)
+                  for post_id, pub_date in posts]
+        if len(batch) >= BATCH_SIZE:
+            TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    TimelineEntry.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+def follower_batches(author_id):
+    followers = Follow.objects.filter(author_id=author_id).values_list('user_id', flat=True).order_by()
+    batch = []
+    for user_id in followers.iterator():
+        batch.append(user_id)
+        if len(batch) >= BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def rebalance(author_id, delta):
+    """Переводит автора между раскладкой и подмешиванием, если подписка пересекла TIMELINE_FANOUT_LIMIT.
+
+    Выше порога строки автора в лентах не нужны — его записи подмешиваются
+    при чтении. При возврате под порог ленты подписчиков заполняются заново,
+    иначе записи, вышедшие выше порога, из лент бы пропали.
+    """
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    followers = AuthorStats.objects.for_user(author_id).followers_count
+    # сравниваются числа до и после: счётчик мог сдвинуться сразу на несколько подписок
+    previous = followers - delta
+    if previous <= limit < followers:
+        for user_ids in follower_batches(author_id):
+            TimelineEntry.objects.filter(user_id__in=user_ids, author_id=author_id).delete()
+    elif followers <= limit < previous:
+        for user_ids in follower_batches(author_id):
+            backfill_followers(author_id, user_ids)
+
+
+def cleanup(follow):
+    TimelineEntry.objects.filter(user_id=follow.user_id, author_id=follow.author_id).delete()
+
+
+def merged_authors(user):
+    """Авторы из подписок пользователя, чьи записи не раскладываются по лентам."""
+    return list(Follow.objects.filter(
+        user=user, author__stats__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).values_list('author_id', flat=True))
+
+
+def feed_queryset(user):
+    """Записи ленты подписок пользователя одним запросом — для страниц ?page=N.
+
+    Запрос ленивый: пока страницы листаются курсором через TimelinePaginator,
+    он не выполняется.
+    """
+    merged = Follow.objects.filter(
+        user=user, author__stats__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).values('author_id')
+    return Post.objects.filter(
+        Q(pk__in=TimelineEntry.objects.filter(user=user).values('post')) | Q(author_id__in=merged))
+
+
+def keyset(queryset, id_field, cursor, newer):
+    """(pub_date, id) строк по одну сторону от курсора в порядке обхода страницы."""
+    if newer:
+        order, lookup = ('pub_date', id_field), 'gt'
+    else:
+        order, lookup = ('-pub_date', f'-{id_field}'), 'lt'
+    if cursor is not None:
+        pub_date, pk = cursor
+        queryset = queryset.filter(Q(**{f'pub_date__{lookup}': pub_date})
+                                   | Q(pub_date=pub_date, **{f'{id_field}__{lookup}': pk}))
+    return queryset.order_by(*order).values_list('pub_date', id_field)
+
+
+class TimelinePaginator:
+    """Keyset-пагинация ленты подписок с интерфейсом posts.pagination.CursorPaginator.
+
+    Ключи страницы читаются из TimelineEntry по индексу timeline_user_feed_idx
+    (user, pub_date, post) без сортировки всей ленты, записи авторов выше
+    TIMELINE_FANOUT_LIMIT — запросом на автора по post_author_feed_idx.
+    Строки queryset выбираются только для ключей страницы.
+    """
+
+    def __init__(self, queryset, per_page, user):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.user = user
+
+    @cached_property
+    def merged(self):
+        return merged_authors(self.user)
+
+    def keys(self, cursor, newer):
+        limit = self.per_page + 1
+        entries = TimelineEntry.objects.filter(user=self.user)
+        if self.merged:
+            # строки, оставшиеся с тех пор, как автор был ниже порога
+            entries = entries.exclude(author_id__in=self.merged)
+        sources = [list(keyset(entries, 'post_id', cursor, newer)[:limit])]
+        sources += [list(keyset(Post.objects.filter(author_id=author_id), 'id', cursor, newer)[:limit])
+                    for author_id in self.merged]
+        return list(islice(heapq.merge(*sources, reverse=not newer), limit))
+
+    def rows(self, keys):
+        return list(self.queryset.filter(pk__in=[pk for _, pk in keys]).order_by('-pub_date', '-id'))
+
+    def page_after(self, cursor):
+        keys = self.keys(cursor, newer=False)
+        return CursorPage(self.rows(keys[:self.per_page]), len(keys) > self.per_page, cursor is not None)
+
+    def page_before(self, cursor):
+        keys = self.keys(cursor, newer=True)
+        return CursorPage(self.rows(keys[:self.per_page]), True, len(keys) > self.per_page)
@@ -0,0 +1,93 @@
+import os
+import tempfile
+
+from PIL import Image
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+
+# Параметры сохранения по формату; остальные форматы (GIF, BMP, TIFF…) пересохраняются в PNG
+SAVE_OPTIONS = {
+    'JPEG': {'quality': 85, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 85},
+}
+# MPO — JPEG с камер телефонов с дополнительными кадрами, сохраняется обычным JPEG
+JPEG_FORMATS = ('JPEG', 'MPO')
+FALLBACK_FORMAT = 'PNG'
+PNG_MODES = ('1', 'L', 'LA', 'I', 'P', 'RGB', 'RGBA')
+# Поворот по тегу EXIF Orientation: после удаления EXIF он должен быть применён к пикселям
+TRANSPOSE = {
+    2: Image.FLIP_LEFT_RIGHT,
+    3: Image.ROTATE_180,
+    4: Image.FLIP_TOP_BOTTOM,
+    5: Image.TRANSPOSE,
+    6: Image.ROTATE_270,
+    7: Image.TRANSVERSE,
+    8: Image.ROTATE_90,
+}
+
+
+def open_source(uploaded):
+    # большие загрузки Django уже держит во временном файле — читаем прямо с диска
+    if hasattr(uploaded, 'temporary_file_path'):
+        return Image.open(uploaded.temporary_file_path())
+    uploaded.seek(0)
+    return Image.open(uploaded)
+
+
+def save_format(image_format):
+    if image_format in JPEG_FORMATS:
+        return 'JPEG'
+    return image_format if image_format in SAVE_OPTIONS else FALLBACK_FORMAT
+
+
+def prepare(uploaded):
+    """Проверяет загруженное изображение по заголовку и сохраняет уменьшенную копию без метаданных.
+
+    Размеры читаются до декодирования. JPEG декодируется сразу в уменьшенном
+    масштабе (draft), остальные форматы — целиком, поэтому для них предел
+    разрешения ниже: UPLOAD_IMAGE_MAX_DECODED_PIXELS.
+    """
+    if uploaded.size > settings.UPLOAD_IMAGE_MAX_BYTES:
+        raise ValidationError(
+            'Файл слишком большой: допускается не больше %(limit)d МБ.',
+            code='file_too_large', params={'limit': settings.UPLOAD_IMAGE_MAX_BYTES // 2 ** 20})
+    with open_source(uploaded) as image:
+        width, height = image.size
+        image_format = image.format
+        if image_format in JPEG_FORMATS:
+            max_pixels = settings.UPLOAD_IMAGE_MAX_PIXELS
+        else:
+            max_pixels = min(settings.UPLOAD_IMAGE_MAX_PIXELS, settings.UPLOAD_IMAGE_MAX_DECODED_PIXELS)
+        if width * height > max_pixels:
+            raise ValidationError(
+                'Изображение слишком большое: %(width)d×%(height)d пикселей.',
+                code='image_too_large', params={'width': width, 'height': height})
+        target_format = save_format(image_format)
+        orientation = image.getexif().get(0x0112)
+        limit = settings.UPLOAD_IMAGE_MAX_SIDE
+        # draft действует только на JPEG; reduce внутри thumbnail уменьшает уже декодированное изображение
+        image.thumbnail((limit, limit))
+        icc_profile = image.info.get('icc_profile')
+        if orientation in TRANSPOSE:
+            image = image.transpose(TRANSPOSE[orientation])
+        if target_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        elif target_format == 'PNG' and image.mode not in PNG_MODES:
+            image = image.convert('RGBA')
+        # результат больше FILE_UPLOAD_MAX_MEMORY_SIZE уходит из памяти во временный файл
+        buffer = tempfile.SpooledTemporaryFile(max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE,
+                                               dir=settings.FILE_UPLOAD_TEMP_DIR)
+        # EXIF с координатами и данными камеры не копируется, цветовой профиль сохраняется
+        options = dict(SAVE_OPTIONS[target_format])
+        if icc_profile:
+            options['icc_profile'] = icc_profile
+        image.save(buffer, target_format, **options)
+    size = buffer.tell()
+    buffer.seek(0)
+    name, content_type = os.path.basename(uploaded.name), uploaded.content_type
+    if target_format == FALLBACK_FORMAT and image_format != FALLBACK_FORMAT:
+        # у пересохранённого GIF, BMP или TIFF расширение и тип должны совпадать с содержимым
+        name, content_type = os.path.splitext(name)[0] + '.png', 'image/png'
+    return UploadedFile(buffer, name, content_type, size)
@@ -7,7 +7,9 @@ urlpatterns = [
     path("follow/", views.follow_index, name="follow_index"),
     path('', views.index, name='index'),
     path('new/', views.new_post, name='new_post'),
+    path('search/', views.search, name='search'),
     path('<str:username>/', views.profile, name='profile'),
+    path('<str:username>/export/', views.export, name='export'),
     path('<str:username>/<int:post_id>/', views.post_view, name='post'),
     path('<str:username>/<int:post_id>/edit/', views.post_edit,
          name='post_edit'),
@@ -1,29 +1,48 @@
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.http import StreamingHttpResponse
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404
 from django.shortcuts import redirect
-from django.core.paginator import Paginator
+from django.db import transaction
 
+from . import export as author_export, thumbnails
+from .fulltext import SearchResults
 from .forms import PostForm, CommentForm
-from .models import Post, Group, User, Follow, Comment
+from .models import Post, Group, User, Follow, Comment, AuthorStats
+from .page_cache import cache_anonymous_page, conditional_page, mark_incomplete
+from .pagination import FEED_FIELDS, paginate
+from .recent_posts import merged_page
+from .timeline import TimelinePaginator, feed_queryset
 
 
+@conditional_page
+@cache_anonymous_page(lambda: [('global',)])
 def index(request):
-    post_list = Post.objects.select_related('author', 'group').order_by('-pub_date').all()
-    paginator = Paginator(post_list, 10)  # показывать по 10 записей на странице.
-    page_number = request.GET.get('page')  # переменная в URL с номером запрошенной страницы
-    page = paginator.get_page(page_number)  # получить записи с нужным смещением
+    post_list = Post.objects.only(*FEED_FIELDS)
+    # показывать по 10 записей на странице: ?after=/?before= или классический ?page=N
+    page, paginator = paginate(request, post_list, 10)
     return render(request, 'index.html', {'page': page, 'paginator': paginator})
 
 
+@conditional_page
+@cache_anonymous_page(lambda slug: [('group', slug)])
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = Post.objects.select_related('author', 'group').filter(group=group).order_by('-pub_date').all()
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    posts = Post.objects.only(*FEED_FIELDS).filter(group=group)
+    page, paginator = paginate(request, posts, 10)
     return render(request, 'group.html', {'page': page, 'paginator': paginator})
 
 
+def search(request):
+    query = request.GET.get('q', '').strip()
+    # SearchResults считает и выбирает только запрошенную страницу выдачи
+    paginator = Paginator(SearchResults(query), 10)
+    page = paginator.get_page(request.GET.get('page'))
+    return render(request, 'search.html', {'page': page, 'paginator': paginator, 'query': query})
+
+
 @login_required
 def new_post(request):
     if request.method == 'POST':
@@ -32,37 +51,48 @@ def new_post(request):
             post = form.save(commit=False)
             post.author = request.user
             post.save()
+            if post.image:
+                transaction.on_commit(lambda: thumbnails.schedule(post.image.name))
             return redirect('index')
         return render(request, 'new_post.html', {'form': form})
     form = PostForm()
     return render(request, 'new_post.html', {'form': form})
 
 
+@conditional_page
+@cache_anonymous_page(lambda username: [('author', username)])
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    posts = Post.objects.select_related('author').filter(author=author).order_by('-pub_date').all()
-    paginator = Paginator(posts, 5)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    posts = Post.objects.only(*FEED_FIELDS).filter(author=author)
+    page, paginator = paginate(request, posts, 5)
     if request.user.is_authenticated:
         following = Follow.objects.filter(user=request.user, author=author).exists()
     else:
         following = True
+    stats = AuthorStats.objects.for_user(author)
     return render(request, 'profile.html',
-                  {'page': page, 'author': author, 'paginator': paginator, 'following': following})
+                  {'page': page, 'author': author, 'paginator': paginator, 'following': following,
+                   'stats': stats})
 
 
+@conditional_page
+@cache_anonymous_page(lambda username, post_id: [('author', username), ('post', post_id)])
 def post_view(request, username, post_id):
     author = get_object_or_404(User, username=username)
-    post = get_object_or_404(Post.objects.select_related('author'), id=post_id)
-    comments = post.comments.all()
+    post = get_object_or_404(Post.objects.select_related('author', 'group'), id=post_id)
+    comments = post.comments.select_related('author')
     form = CommentForm()
     if request.user.is_authenticated:
         following = Follow.objects.filter(user=request.user, author=author).exists()
     else:
         following = True
+    stats = AuthorStats.objects.for_user(author)
+    thumbnail = thumbnails.resolve([post.image.name]).get(post.image.name) if post.image else None
+    if post.image and not (thumbnail and thumbnail['complete']):
+        mark_incomplete(request)
     return render(request, 'post.html',
-                  {'post': post, 'author': author, 'comments': comments, 'form': form, 'following': following})
+                  {'post': post, 'author': author, 'comments': comments, 'form': form, 'following': following,
+                   'stats': stats, 'thumbnail': thumbnail})
 
 
 @login_required
@@ -74,16 +104,32 @@ def post_edit(request, username, post_id):
     form = PostForm(request.POST or None, files=request.FILES or None, instance=post)
     if request.method == 'POST':
         if form.is_valid():
-            form.save()
+            post = form.save()
+            if post.image and 'image' in form.changed_data:
+                transaction.on_commit(lambda: thumbnails.schedule(post.image.name))
             return redirect(f'/{username}/{post_id}')
     return render(request, 'new_post.html', {'form': form, 'post': post})
 
 
+@login_required
+def export(request, username):
+    author = get_object_or_404(User, username=username)
+    if request.user != author and not request.user.is_staff:
+        raise PermissionDenied
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in author_export.CONTENT_TYPES:
+        export_format = 'ndjson'
+    response = StreamingHttpResponse(author_export.stream(author, export_format),
+                                     content_type=author_export.CONTENT_TYPES[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{author.username}.{export_format}"'
+    return response
+
+
 @login_required
 def add_comment(request, username, post_id):
     author = get_object_or_404(User, username=username)
     post = get_object_or_404(Post, pk=post_id, author=author)
-    comments = post.comments.all()
+    comments = post.comments.select_related('author')
     if request.method == 'POST':
         form = CommentForm(request.POST)
         if form.is_valid():
@@ -99,14 +145,12 @@ def add_comment(request, username, post_id):
 
 @login_required
 def follow_index(request):
-    follows = Follow.objects.select_related('author').filter(user=request.user)
-    author = []
-    for follow in follows:
-        author.append(follow.author)
-    post_list = Post.objects.filter(author__in=author).order_by('-pub_date')
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    if settings.FOLLOW_FEED_BACKEND == 'recent':
+        page, paginator = merged_page(request, request.user, 10)
+    else:
+        post_list = feed_queryset(request.user).only(*FEED_FIELDS)
+        page, paginator = paginate(request, post_list, 10, TimelinePaginator(
+            Post.objects.only(*FEED_FIELDS), 10, request.user))
     return render(request, "follow.html", {'page': page, 'paginator': paginator})
 
 
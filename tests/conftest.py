@@ -1,4 +1,8 @@
 pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
+    'tests.fixtures.fixture_cache',
+    'tests.fixtures.fixture_settings',
+    'tests.fixtures.fixture_search',
+    'tests.fixtures.fixture_queries',
 ]
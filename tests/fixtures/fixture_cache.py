@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    # версии страниц и кольца лент живут в кэше, а база между тестами очищается
+    from django.core.cache import cache
+    cache.clear()
+    yield
+    cache.clear()
@@ -0,0 +1,21 @@
+import pytest
+
+
+@pytest.fixture
+def assert_query_budget(client):
+    """Запрашивает url и падает, если представление превысило бюджет из settings.QUERY_BUDGETS."""
+    from django.conf import settings
+    from django.db import connection, reset_queries
+    from django.test.utils import CaptureQueriesContext
+
+    def check(url, http_client=client):
+        reset_queries()
+        with CaptureQueriesContext(connection) as queries:
+            response = http_client.get(url)
+        name = response.resolver_match.view_name
+        budget = settings.QUERY_BUDGETS[name]
+        executed = '\n'.join(query['sql'] for query in queries)
+        assert len(queries) <= budget, \
+            f'Представление `{name}` выполнило {len(queries)} запросов при бюджете {budget}:\n{executed}'
+        return response
+    return check
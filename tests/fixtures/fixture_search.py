@@ -0,0 +1,15 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_search_index(request, django_db_blocker):
+    # виртуальная таблица FTS5 не входит в модели, и flush её не очищает
+    yield
+    if request.node.get_closest_marker('django_db') is None:
+        return
+    from django.db import connection
+    from posts import fulltext
+    with django_db_blocker.unblock():
+        if fulltext.available():
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {fulltext.TABLE}')
@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def inline_thumbnails(settings):
+    # пул процессов подключился бы к рабочей базе, а не к тестовой
+    settings.THUMBNAIL_WORKERS = 0
@@ -0,0 +1,55 @@
+import pytest
+from django.db import connection
+from django.test import override_settings
+
+from posts import fulltext
+from posts.models import AuthorStats, Comment, Group, Post
+
+
+class TestPostAdmin:
+
+    def create_posts(self, user, count, group=None):
+        return [Post.objects.create(text=f'Тестовый пост {i}', author=user, group=group) for i in range(count)]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_changelist_estimates_count(self, admin_client, user):
+        self.create_posts(user, 5)
+        with override_settings(ADMIN_EXACT_COUNT_LIMIT=3):
+            response = admin_client.get('/admin/posts/post/')
+            assert response.status_code == 200
+            assert response.context['cl'].paginator.estimated, \
+                'Проверьте, что при большой таблице админка не считает записи точно'
+
+            response = admin_client.get('/admin/posts/post/?exact_count=1')
+            assert response.status_code == 200, 'Проверьте, что `?exact_count=1` не ломает список'
+            cl = response.context['cl']
+            assert cl.result_count == 5 and not cl.paginator.estimated, \
+                'Проверьте, что `?exact_count=1` включает точный подсчёт'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_move_to_group(self, admin_client, user, group):
+        posts = self.create_posts(user, 3)
+        response = admin_client.post('/admin/posts/post/', {
+            'action': 'move_to_group', '_selected_action': [post.pk for post in posts[:2]], 'group': group.pk,
+        })
+        assert response.status_code == 302
+        assert list(Group.objects.get(pk=group.pk).posts.order_by('pk')) == posts[:2], \
+            'Проверьте, что действие переносит выбранные записи в сообщество'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_bulk_delete_keeps_counters(self, admin_client, user):
+        posts = self.create_posts(user, 3)
+        Comment.objects.create(post=posts[0], author=user, text='Комментарий')
+        AuthorStats.objects.recount(user)
+
+        response = admin_client.post('/admin/posts/post/', {
+            'action': 'delete_selected', '_selected_action': [post.pk for post in posts[:2]], 'post': 'yes',
+        })
+        assert response.status_code == 302
+        assert list(Post.objects.all()) == posts[2:], 'Проверьте, что выбранные записи удалены'
+        assert not Comment.objects.exists(), 'Проверьте, что комментарии удалены вместе с записями'
+        assert AuthorStats.objects.get(pk=user.pk).posts_count == 1, \
+            'Проверьте, что массовое удаление поправляет счётчик записей автора'
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid FROM {fulltext.TABLE} WHERE rowid IN (%s, %s)', [posts[0].pk, posts[1].pk])
+            assert not cursor.fetchall(), 'Проверьте, что удалённые записи убраны из поискового индекса'
@@ -0,0 +1,93 @@
+import pytest
+from django.test import Client
+
+from posts.models import Comment, Follow, Post
+
+
+class TestApi:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_posts_cursor_and_fields(self, user, assert_query_budget):
+        created = [Post.objects.create(text=f'Запись номер {number} ' + 'текст ' * 60, author=user)
+                   for number in range(5)]
+        client = Client()
+        response = assert_query_budget('/api/posts?limit=2', http_client=client)
+        data = response.json()
+        assert [row['id'] for row in data['results']] == [created[4].id, created[3].id], \
+            'Проверьте, что записи отдаются от новых к старым'
+        assert set(data['results'][0]) == {'id', 'author', 'group', 'pub_date', 'preview', 'image',
+                                           'comments_count'}
+        assert len(data['results'][0]['preview']) == 200 and data['results'][0]['author'] == user.username
+
+        seen = [row['id'] for row in data['results']]
+        while data['next']:
+            data = client.get('/api/posts', {'limit': 2, 'after': data['next']}).json()
+            seen += [row['id'] for row in data['results']]
+        assert seen == [post.id for post in reversed(created)], 'Проверьте, что курсор проходит ленту без пропусков'
+
+        data = client.get('/api/posts?fields=id,text').json()
+        assert set(data['results'][0]) == {'id', 'text'} and data['results'][0]['text'] == created[4].text, \
+            'Проверьте, что fields= выбирает поля ответа'
+        assert client.get('/api/posts?fields=password').status_code == 400
+        assert client.get('/api/posts?after=мусор').status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_malformed_cursor(self, user, post):
+        client = Client()
+        client.force_login(user)
+        for url in ('/api/posts', '/api/feed'):
+            for token in ('aW5mOjE', 'MWUyMDox', 'MTYwMDAwMDAwMDoxODQ0Njc0NDA3MzcwOTU1MTYxNg', 'мусор'):
+                response = client.get(url, {'after': token})
+                assert response.status_code == 400 and 'error' in response.json(), \
+                    f'Проверьте, что испорченный курсор `{token}` в `{url}` даёт ошибку 400, а не 500'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_bulk_ids_keep_order(self, user, post, assert_query_budget):
+        other = Post.objects.create(text='Вторая', author=user)
+        response = assert_query_budget(f'/api/posts?ids={other.id},999999,{post.id}&fields=id,preview',
+                                       http_client=Client())
+        data = response.json()
+        assert [row['id'] for row in data['results']] == [other.id, post.id] and data['missing'] == [999999], \
+            'Проверьте, что ids= возвращает записи в порядке запроса и перечисляет ненайденные'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_comments_groups_and_detail(self, user, post_with_group, assert_query_budget):
+        for number in range(3):
+            Comment.objects.create(post=post_with_group, author=user, text=f'Комментарий {number}')
+        client = Client()
+        data = assert_query_budget(f'/api/posts/{post_with_group.id}/comments?limit=2', http_client=client).json()
+        assert [row['text'] for row in data['results']] == ['Комментарий 0', 'Комментарий 1'] and data['next']
+        data = client.get(f'/api/posts/{post_with_group.id}/comments', {'after': data['next']}).json()
+        assert [row['text'] for row in data['results']] == ['Комментарий 2'] and data['next'] is None
+        assert client.get('/api/posts/999999/comments').status_code == 404
+
+        data = assert_query_budget('/api/groups', http_client=client).json()
+        assert data['results'][0]['slug'] == post_with_group.group.slug
+
+        data = assert_query_budget(f'/api/posts/{post_with_group.id}', http_client=client).json()
+        assert data['text'] == post_with_group.text and data['group'] == post_with_group.group.slug \
+            and data['comments_count'] == 3
+        assert client.get('/api/posts/999999').status_code == 404
+        assert client.post('/api/posts').status_code == 405, 'Проверьте, что API только для чтения'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_feed_requires_login(self, user, django_user_model, assert_query_budget):
+        author = django_user_model.objects.create_user(username='FeedAuthor')
+        Follow.objects.create(user=user, author=author)
+        post = Post.objects.create(text='Запись в ленте', author=author)
+        Post.objects.create(text='Чужая запись', author=django_user_model.objects.create_user(username='Other'))
+
+        assert Client().get('/api/feed').status_code == 401
+        client = Client()
+        client.force_login(user)
+        data = assert_query_budget('/api/feed', http_client=client).json()
+        assert [row['id'] for row in data['results']] == [post.id], \
+            'Проверьте, что лента API содержит только записи подписок'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_standard_encoder_fallback(self, post, monkeypatch):
+        from posts import api
+        url = f'/api/posts/{post.id}'
+        fast = Client().get(url).json()
+        monkeypatch.setattr(api, 'orjson', None)
+        assert Client().get(url).json() == fast, 'Проверьте, что без orjson ответ не меняется'
@@ -0,0 +1,44 @@
+import pytest
+from django.urls import get_resolver
+
+from posts import benchmarks
+from posts.models import Comment, Follow, Post
+
+
+class TestBenchmarks:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_generate_is_deterministic(self):
+        summary = benchmarks.generate(30, 120, seed=7)
+        assert Post.objects.count() == 120 and Comment.objects.count() == summary['comments'], \
+            'Проверьте, что генератор создаёт заданное число записей и комментариев'
+        snapshot = list(Post.objects.order_by('pk').values_list('author__username', 'text')[:20])
+        follows = set(Follow.objects.values_list('user__username', 'author__username'))
+
+        Comment.objects.all().delete()
+        Post.objects.all().delete()
+        Follow.objects.all().delete()
+        benchmarks.generate(30, 120, seed=7)
+        assert list(Post.objects.order_by('pk').values_list('author__username', 'text')[:20]) == snapshot, \
+            'Проверьте, что одинаковый seed даёт одинаковые записи'
+        assert set(Follow.objects.values_list('user__username', 'author__username')) == follows
+
+    @pytest.mark.django_db(transaction=True)
+    def test_every_view_is_measured(self):
+        benchmarks.generate(20, 60)
+        requests = benchmarks.view_requests()
+        names = {pattern.name for pattern in get_resolver('posts.urls').url_patterns}
+        assert names <= set(requests), 'Проверьте, что у каждого маршрута posts/urls.py есть замер'
+
+        row = benchmarks.measure(*requests['profile_follow'], repeat=2)
+        assert row['status'] == 302 and row['queries'] > 0, \
+            'Проверьте, что замер возвращает статус и число запросов'
+
+    def test_compare_flags_regressions(self):
+        baseline = {'results': [{'scale': 10, 'view': 'index', 'p50_ms': 10.0, 'queries': 3}]}
+        current = {'results': [{'scale': 10, 'view': 'index', 'p50_ms': 14.0, 'queries': 3}]}
+        assert benchmarks.compare(baseline, current, 1.25)[0]['regression'], \
+            'Проверьте, что замедление сверх порога считается регрессией'
+        assert not benchmarks.compare(baseline, current, 1.5)[0]['regression']
+        assert not benchmarks.compare(baseline, current, 1.25, min_delta_ms=5)[0]['regression'], \
+            'Проверьте, что небольшой абсолютный прирост считается шумом'
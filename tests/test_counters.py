@@ -0,0 +1,99 @@
+import pytest
+from django.core.management import call_command
+
+from posts.models import Comment, Post
+
+
+class TestCommentsCounter:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_comments_count_follows_comments(self, user, post):
+        first = Comment.objects.create(post=post, author=user, text='Комментарий 1')
+        Comment.objects.create(post=post, author=user, text='Комментарий 2')
+        post.refresh_from_db()
+        assert post.comments_count == 2, 'Проверьте, что `comments_count` растёт при создании комментария'
+
+        first.delete()
+        post.refresh_from_db()
+        assert post.comments_count == 1, 'Проверьте, что `comments_count` уменьшается при удалении комментария'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_post_delete_skips_per_comment_work(self, user, post):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        Comment.objects.bulk_create(
+            Comment(post=post, author=user, text=f'Комментарий {i}') for i in range(50))
+        with CaptureQueriesContext(connection) as queries:
+            post.delete()
+        assert not Comment.objects.exists()
+        assert len(queries) < 20, \
+            'Проверьте, что при удалении записи комментарии не обновляют счётчик и кэш по одному'
+
+        other = Post.objects.create(text='Другая запись', author=user)
+        Comment.objects.create(post=other, author=user, text='Комментарий').delete()
+        other.refresh_from_db()
+        assert other.comments_count == 0, 'Проверьте, что одиночное удаление комментария уменьшает счётчик'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_recount_repairs_drift(self, user, post, post_with_group):
+        Comment.objects.create(post=post, author=user, text='Комментарий')
+        Post.objects.filter(pk=post.pk).update(comments_count=42)
+        Post.objects.filter(pk=post_with_group.pk).update(comments_count=3)
+
+        call_command('recount_counters', batch_size=1)
+
+        post.refresh_from_db()
+        post_with_group.refresh_from_db()
+        assert post.comments_count == 1, 'Проверьте, что `recount_counters` исправляет завышенный счётчик'
+        assert post_with_group.comments_count == 0, 'Проверьте, что `recount_counters` обнуляет счётчик без комментариев'
+
+
+class TestAuthorStats:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_stats_follow_changes(self, user_client, user, post):
+        from django.contrib.auth import get_user_model
+        from posts.models import AuthorStats, Follow
+
+        author = get_user_model().objects.create_user(username='TestAuthor_1')
+        stats = AuthorStats.objects.for_user(author)
+        assert (stats.followers_count, stats.posts_count) == (0, 0)
+
+        user_client.get(f'/{author.username}/follow/')
+        Post.objects.create(text='Тестовый пост автора', author=author)
+        stats.refresh_from_db()
+        assert stats.followers_count == 1, 'Проверьте, что подписка увеличивает число подписчиков автора'
+        assert stats.posts_count == 1, 'Проверьте, что новая запись увеличивает счётчик записей'
+        assert AuthorStats.objects.for_user(user).following_count == 1, \
+            'Проверьте, что подписка увеличивает число подписок пользователя'
+
+        Follow.objects.filter(author=author).delete()
+        stats.refresh_from_db()
+        assert stats.followers_count == 0, 'Проверьте, что отписка уменьшает число подписчиков автора'
+
+        response = user_client.get(f'/{author.username}/')
+        assert response.context['stats'].posts_count == 1, \
+            'Проверьте, что передали счётчики автора в контекст страницы `/<username>/`'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_stats_clamp_at_zero(self, user, post):
+        from posts.models import AuthorStats
+        from posts.signals import bump_stats
+
+        AuthorStats.objects.for_user(user)
+        AuthorStats.objects.filter(pk=user.pk).update(posts_count=2)
+        bump_stats(user.pk, 'posts_count', -3)
+        assert AuthorStats.objects.get(pk=user.pk).posts_count == 0, \
+            'Проверьте, что разошедшийся счётчик уменьшается до нуля, а не остаётся прежним'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_recount_repairs_stats(self, user, post):
+        from posts.models import AuthorStats
+
+        AuthorStats.objects.for_user(user)
+        AuthorStats.objects.filter(pk=user.pk).update(posts_count=7, followers_count=2)
+        call_command('recount_counters')
+        stats = AuthorStats.objects.get(pk=user.pk)
+        assert (stats.posts_count, stats.followers_count) == (1, 0), \
+            'Проверьте, что `recount_counters` исправляет счётчики автора'
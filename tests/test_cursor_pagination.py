@@ -0,0 +1,90 @@
+import base64
+
+import pytest
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from posts.pagination import CursorPage, decode_cursor, encode_cursor
+
+# inf:1, 1e20:1 и pk за пределами 64 бит
+FORGED_CURSORS = ('aW5mOjE', 'MWUyMDox', base64.urlsafe_b64encode(b'1600000000.0:' + str(2 ** 64).encode()).decode())
+
+
+class TestCursorPagination:
+
+    def create_posts(self, user, count):
+        from posts.models import Post
+        return [Post.objects.create(text=f'Тестовый пост {i}', author=user) for i in range(count)]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_cursor_roundtrip(self, post):
+        assert decode_cursor(encode_cursor(post)) == (post.pub_date, post.pk), \
+            'Проверьте, что токен курсора однозначно кодирует `(pub_date, id)`'
+        assert decode_cursor('мусор') is None, 'Проверьте, что некорректный токен игнорируется'
+        for token in FORGED_CURSORS:
+            assert decode_cursor(token) is None, f'Проверьте, что подделанный токен `{token}` игнорируется'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_after_and_before(self, client, user):
+        posts = self.create_posts(user, 25)
+        newest_first = posts[::-1]
+
+        response = client.get('/')
+        first = response.context['page']
+        assert [p.pk for p in first] == [p.pk for p in newest_first[:10]]
+
+        response = client.get(f'/?after={encode_cursor(first.object_list[-1])}')
+        second = response.context['page']
+        assert type(second) == CursorPage, 'Проверьте, что `?after=` обслуживается keyset-пагинацией'
+        assert [p.pk for p in second] == [p.pk for p in newest_first[10:20]], \
+            'Проверьте, что `?after=` отдаёт записи, следующие за курсором'
+        assert second.has_next() and second.has_previous()
+
+        response = client.get(f'/?after={second.next_cursor}')
+        third = response.context['page']
+        assert [p.pk for p in third] == [p.pk for p in newest_first[20:]]
+        assert not third.has_next(), 'Проверьте, что на последней странице нет ссылки вперёд'
+
+        response = client.get(f'/?before={third.previous_cursor}')
+        back = response.context['page']
+        assert [p.pk for p in back] == [p.pk for p in newest_first[10:20]], \
+            'Проверьте, что `?before=` возвращает предыдущую страницу'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_page_number_fallback(self, client, user):
+        self.create_posts(user, 12)
+        response = client.get(f'/{user.username}/?page=2')
+        page = response.context['page']
+        assert page.number == 2 and len(page) == 5, 'Проверьте, что классический `?page=N` продолжает работать'
+        content = response.content.decode()
+        assert '?page=1' in content and '?page=3' in content and 'after=' not in content, \
+            'Проверьте, что ссылки классической страницы ведут на соседние номера, а не на курсор'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_first_page_without_count(self, user):
+        self.create_posts(user, 12)
+        client = Client()
+        client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get('/')
+        assert type(response.context['page']) == CursorPage and len(response.context['page']) == 10, \
+            'Проверьте, что первая страница без параметров обслуживается keyset-пагинацией'
+        assert not any('COUNT(' in query['sql'] for query in queries.captured_queries), \
+            'Проверьте, что первая страница не считает все записи'
+        assert 'after=' in response.content.decode()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_forged_cursor_gives_first_page(self, user, group):
+        from posts.models import Follow, Post
+        author = type(user).objects.create_user(username='author_forged')
+        Post.objects.create(text='Пост в группе', author=author, group=group)
+        Follow.objects.create(user=user, author=author)
+        client = Client()
+        client.force_login(user)
+        for url in ('/', f'/group/{group.slug}', f'/{author.username}/', '/follow/'):
+            for token in FORGED_CURSORS:
+                for param in ('after', 'before'):
+                    response = client.get(f'{url}?{param}={token}')
+                    assert response.status_code == 200 and len(response.context['page']) == 1, \
+                        f'Проверьте, что подделанный курсор на `{url}` даёт первую страницу, а не ошибку'
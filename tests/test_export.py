@@ -0,0 +1,53 @@
+import csv
+import io
+import json
+import zipfile
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import Client
+
+from posts.models import Comment, Post
+
+
+class TestExport:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_export_ndjson(self, user_client, user, post):
+        comment = Comment.objects.create(post=post, author=user, text='Мой комментарий')
+        response = user_client.get(f'/{user.username}/export/')
+        assert response.status_code == 200 and response.streaming, 'Проверьте, что выгрузка отдаётся потоком'
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        assert [(row['model'], row['id']) for row in rows] == [('post', post.pk), ('comment', comment.pk)], \
+            'Проверьте, что выгружаются записи и комментарии автора'
+        assert rows[0]['text'] == post.text
+
+    @pytest.mark.django_db(transaction=True)
+    def test_export_csv_and_access(self, user_client, user, post):
+        response = Client().get(f'/{user.username}/export/?format=csv')
+        assert response.status_code == 302, 'Проверьте, что выгрузка требует входа'
+
+        response = user_client.get(f'/{user.username}/export/?format=csv')
+        rows = list(csv.DictReader(io.StringIO(b''.join(response.streaming_content).decode())))
+        assert rows[0]['model'] == 'post' and rows[0]['text'] == post.text, 'Проверьте выгрузку в CSV'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_export_zip_with_images(self, settings, tmp_path, user_client, user):
+        settings.MEDIA_ROOT = str(tmp_path)
+        post = Post(text='Запись с файлом', author=user)
+        post.image.save('picture.jpg', ContentFile(b'jpeg-bytes' * 1000), save=False)
+        post.save()
+
+        response = user_client.get(f'/{user.username}/export/?format=zip')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        assert archive.read(f'images/{post.image.name}') == b'jpeg-bytes' * 1000, \
+            'Проверьте, что изображения попадают в архив'
+        assert json.loads(archive.read('posts.ndjson'))['id'] == post.pk
+
+    @pytest.mark.django_db(transaction=True)
+    def test_export_command(self, tmp_path, user, post):
+        target = tmp_path / 'dump.ndjson'
+        call_command('export_author', user.username, output=str(target))
+        assert json.loads(target.read_text(encoding='utf-8'))['id'] == post.pk, \
+            'Проверьте, что команда export_author пишет выгрузку в файл'
@@ -6,6 +6,8 @@ from django.contrib.auth import get_user_model
 from django.core.paginator import Paginator, Page
 from django.db.models import fields
 
+from posts.pagination import CursorPage
+
 try:
     from posts.models import Post
 except ImportError:
@@ -111,15 +113,21 @@ class TestFollow:
         response = self.check_url(user_client, f'/follow', '/follow/')
         assert 'paginator' in response.context, \
             'Проверьте, что передали переменную `paginator` в контекст страницы `/follow/`'
-        assert type(response.context['paginator']) == Paginator, \
-            'Проверьте, что переменная `paginator` на странице `/follow/` типа `Paginator`'
         assert 'page' in response.context, \
             'Проверьте, что передали переменную `page` в контекст страницы `/follow/`'
-        assert type(response.context['page']) == Page, \
-            'Проверьте, что переменная `page` на странице `/follow/` типа `Page`'
+        assert type(response.context['page']) == CursorPage, \
+            'Проверьте, что первая страница `/follow/` листается курсором без COUNT(*)'
         assert len(response.context['page']) == 2, \
             'Проверьте, что на странице `/follow/` список статей авторов на которых подписаны'
 
+        response = self.check_url(user_client, '/follow/?page=1', '/follow/')
+        assert type(response.context['paginator']) == Paginator, \
+            'Проверьте, что переменная `paginator` на странице `/follow/?page=1` типа `Paginator`'
+        assert type(response.context['page']) == Page, \
+            'Проверьте, что переменная `page` на странице `/follow/?page=1` типа `Page`'
+        assert len(response.context['page']) == 2, \
+            'Проверьте, что на странице `/follow/?page=1` список статей авторов на которых подписаны'
+
         self.check_url(user_client, f'/{user_2.username}/follow', '/<username>/follow/')
         assert user.follower.count() == 2, 'Проверьте, что вы можете подписаться на пользователя'
         response = self.check_url(user_client, f'/follow', '/follow/')
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from django.core.management import call_command
+
+from posts import fulltext
+from posts.models import AuthorStats, Follow, Group, Post, TimelineEntry, User
+
+
+class TestImportCommand:
+
+    rows = [
+        {'model': 'user', 'username': 'reader'},
+        {'model': 'user', 'username': 'writer', 'first_name': 'Писатель'},
+        {'model': 'group', 'slug': 'cats', 'title': 'Кошки'},
+        {'model': 'follow', 'user': 'reader', 'author': 'writer'},
+        {'model': 'post', 'author': 'writer', 'group': 'cats', 'text': 'Кошки спят', 'pub_date': '2019-01-01T10:00:00'},
+        {'model': 'post', 'author': 'writer', 'text': 'Собаки лают', 'pub_date': '2019-01-02T10:00:00'},
+        {'model': 'post', 'author': 'nobody', 'text': 'Автора нет'},
+    ]
+
+    def write_jsonl(self, path):
+        path.write_text('\n'.join(json.dumps(row, ensure_ascii=False) for row in self.rows), encoding='utf-8')
+        return str(path)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_import_jsonl(self, tmp_path):
+        source = self.write_jsonl(tmp_path / 'dump.jsonl')
+        call_command('import_yatube', source, batch_size=2)
+
+        writer = User.objects.get(username='writer')
+        reader = User.objects.get(username='reader')
+        posts = Post.objects.filter(author=writer).order_by('pub_date')
+        assert [post.text for post in posts] == ['Кошки спят', 'Собаки лают'], \
+            'Проверьте, что записи загружаются, а строки с неизвестным автором пропускаются'
+        assert posts[0].group == Group.objects.get(slug='cats'), 'Проверьте, что сообщество находится по slug'
+        assert posts[0].pub_date.year == 2019, 'Проверьте, что дата публикации берётся из файла'
+        assert Follow.objects.filter(user=reader, author=writer).exists()
+        assert TimelineEntry.objects.filter(user=reader).count() == 2, \
+            'Проверьте, что ленты подписчиков собираются после загрузки'
+        assert AuthorStats.objects.for_user(writer).posts_count == 2
+        assert fulltext.SearchResults('кошка').count() == 1, 'Проверьте, что загруженные записи попадают в поиск'
+
+        call_command('import_yatube', source)
+        assert User.objects.filter(username='writer').count() == 1 and Follow.objects.count() == 1, \
+            'Проверьте, что повторная загрузка не дублирует пользователей и подписки'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_import_csv(self, tmp_path, user):
+        source = tmp_path / 'posts.csv'
+        source.write_text(f'author,text\n{user.username},Запись из CSV\n', encoding='utf-8')
+        call_command('import_yatube', str(source))
+        assert Post.objects.filter(author=user, text='Запись из CSV').exists(), \
+            'Проверьте, что модель CSV определяется по имени файла'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_backfill_once_per_author(self, tmp_path, user, post, monkeypatch):
+        from posts import timeline
+
+        rows = [{'model': 'user', 'username': f'reader_{i}'} for i in range(3)]
+        rows += [{'model': 'follow', 'user': f'reader_{i}', 'author': user.username} for i in range(3)]
+        source = tmp_path / 'follows.jsonl'
+        source.write_text('\n'.join(json.dumps(row) for row in rows), encoding='utf-8')
+        calls = []
+        backfill_followers = timeline.backfill_followers
+        monkeypatch.setattr(timeline, 'backfill_followers',
+                            lambda author_id, user_ids: calls.append(author_id) or backfill_followers(author_id, user_ids))
+
+        call_command('import_yatube', str(source))
+        assert calls == [user.pk], 'Проверьте, что ленты новых подписчиков автора собираются одним вызовом'
+        assert TimelineEntry.objects.filter(post=post).count() == 3, \
+            'Проверьте, что новые подписчики получают записи автора в ленту'
@@ -0,0 +1,75 @@
+import pytest
+from django.test import Client
+
+CONTENT = bytes(range(256)) * 40
+
+
+class TestMediaServing:
+
+    @pytest.fixture
+    def media(self, settings, tmp_path):
+        settings.MEDIA_ROOT = str(tmp_path)
+        (tmp_path / 'posts').mkdir()
+        (tmp_path / 'posts' / 'photo.jpg').write_bytes(CONTENT)
+        (tmp_path / 'cache' / 'ab').mkdir(parents=True)
+        (tmp_path / 'cache' / 'ab' / 'thumb.jpg').write_bytes(CONTENT[:100])
+        return tmp_path
+
+    def body(self, response):
+        return b''.join(response.streaming_content) if response.streaming else response.content
+
+    @pytest.mark.django_db(transaction=True)
+    def test_full_file_and_cache_headers(self, media):
+        response = Client().get('/media/posts/photo.jpg')
+        assert response.status_code == 200 and self.body(response) == CONTENT, \
+            'Проверьте, что загруженные файлы отдаются без DEBUG'
+        assert response['Content-Type'] == 'image/jpeg' and response['Accept-Ranges'] == 'bytes'
+        assert int(response['Content-Length']) == len(CONTENT)
+        assert 'immutable' not in response['Cache-Control']
+
+        response = Client().get('/media/cache/ab/thumb.jpg')
+        assert 'immutable' in response['Cache-Control'], 'Проверьте, что миниатюры кэшируются навсегда'
+
+        assert Client().get('/media/posts/missing.jpg').status_code == 404
+        assert Client().get('/media/../yatube/settings.py').status_code == 404, \
+            'Проверьте, что нельзя выйти за пределы MEDIA_ROOT'
+        assert Client().post('/media/posts/photo.jpg').status_code == 405
+
+    @pytest.mark.django_db(transaction=True)
+    def test_ranges(self, media):
+        response = Client().get('/media/posts/photo.jpg', HTTP_RANGE='bytes=100-199')
+        assert response.status_code == 206 and self.body(response) == CONTENT[100:200], \
+            'Проверьте, что Range отдаёт запрошенный диапазон'
+        assert response['Content-Range'] == f'bytes 100-199/{len(CONTENT)}' and response['Content-Length'] == '100'
+
+        response = Client().get('/media/posts/photo.jpg', HTTP_RANGE='bytes=-10')
+        assert self.body(response) == CONTENT[-10:]
+        response = Client().get('/media/posts/photo.jpg', HTTP_RANGE='bytes=10000-')
+        assert self.body(response) == CONTENT[10000:]
+
+        response = Client().get('/media/posts/photo.jpg', HTTP_RANGE=f'bytes={len(CONTENT)}-')
+        assert response.status_code == 416 and response['Content-Range'] == f'bytes */{len(CONTENT)}'
+
+        response = Client().get('/media/posts/photo.jpg', HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"устаревший"')
+        assert response.status_code == 200 and self.body(response) == CONTENT, \
+            'Проверьте, что при несовпадении If-Range отдаётся весь файл'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_conditional_requests(self, media):
+        response = Client().get('/media/posts/photo.jpg')
+        assert Client().get('/media/posts/photo.jpg',
+                            HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code == 304, \
+            'Проверьте, что If-Modified-Since даёт ответ 304'
+        assert Client().get('/media/posts/photo.jpg', HTTP_IF_NONE_MATCH=response['ETag']).status_code == 304
+
+    @pytest.mark.django_db(transaction=True)
+    def test_sendfile_offload(self, media, settings):
+        settings.MEDIA_SENDFILE_HEADER = 'X-Accel-Redirect'
+        response = Client().get('/media/cache/ab/thumb.jpg')
+        assert response['X-Accel-Redirect'] == '/protected-media/cache/ab/thumb.jpg' and response.content == b'', \
+            'Проверьте, что с X-Accel-Redirect тело отдаёт nginx'
+        assert 'immutable' in response['Cache-Control']
+
+        settings.MEDIA_SENDFILE_HEADER = 'X-Sendfile'
+        response = Client().get('/media/posts/photo.jpg')
+        assert response['X-Sendfile'] == str(media / 'posts' / 'photo.jpg')
@@ -0,0 +1,51 @@
+import json
+import os
+
+import pytest
+from django.test import Client
+
+from posts import metrics
+
+
+class TestMetrics:
+
+    def sample(self, text, line_start):
+        values = [float(line.rsplit(' ', 1)[1]) for line in text.splitlines() if line.startswith(line_start)]
+        return sum(values)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_view_histogram_and_cache_counters(self, user_client, user):
+        from posts.models import Post
+        Post.objects.create(text='Запись без картинки', author=user)
+        before = metrics.render(metrics.collect())
+        user_client.get('/')
+        user_client.get('/')
+        text = Client().get('/metrics').content.decode()
+
+        key = 'yatube_view_duration_seconds_count{view="index",method="GET"}'
+        assert self.sample(text, key) - self.sample(before, key) == 2, \
+            'Проверьте, что время ответа учитывается по имени маршрута'
+        assert 'yatube_view_duration_seconds_bucket{view="index",method="GET",le="+Inf"}' in text
+        hits = 'yatube_cache_requests_total{cache="card",result="hit"}'
+        assert self.sample(text, hits) - self.sample(before, hits) >= 1, \
+            'Проверьте, что считаются попадания в кэш карточек'
+
+    def test_aggregates_worker_files(self, settings, tmp_path):
+        settings.METRICS_DIR = str(tmp_path)
+        key = json.dumps(['post', 'GET'])
+        buckets = [1] + [0] * (len(metrics.DEFAULT_BUCKETS) - 1)
+        (tmp_path / 'metrics_1.json').write_text(json.dumps({
+            'yatube_view_duration_seconds': {key: buckets + [0.004, 1]},
+            'yatube_cache_requests_total': {json.dumps(['page', 'hit']): 5},
+        }))
+        metrics.cache_requests.inc(2, cache='page', result='hit')
+
+        values = metrics.collect()
+        assert values['yatube_cache_requests_total'][json.dumps(['page', 'hit'])] >= 7, \
+            'Проверьте, что счётчики процессов складываются'
+        assert values['yatube_view_duration_seconds'][key][-1] >= 1
+        assert os.path.exists(metrics.process_file()), 'Проверьте, что процесс сбрасывает метрики в METRICS_DIR'
+
+    def test_endpoint_is_private(self):
+        response = Client(REMOTE_ADDR='10.0.0.1').get('/metrics')
+        assert response.status_code == 404, 'Проверьте, что /metrics закрыт для посторонних адресов'
@@ -0,0 +1,167 @@
+import pytest
+
+from posts.models import Comment, Post
+
+
+class TestAnonymousPageCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_pages_are_cached_and_invalidated(self, client, user, post_with_group):
+        urls = ['/', f'/group/{post_with_group.group.slug}', f'/{user.username}/',
+                f'/{user.username}/{post_with_group.id}/']
+        for url in urls:
+            client.get(url)
+            response = client.get(url)
+            assert response.status_code == 200
+            assert response.context is None, f'Проверьте, что страница `{url}` отдаётся анонимам из кэша'
+
+        Comment.objects.create(post=post_with_group, author=user, text='Новый комментарий')
+        for url in urls:
+            response = client.get(url)
+            assert response.context is not None, \
+                f'Проверьте, что комментарий сбрасывает кэш страницы `{url}`'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_unrelated_scope_keeps_cache(self, client, user, post_with_group):
+        url = f'/group/{post_with_group.group.slug}'
+        client.get(url)
+        Post.objects.create(text='Запись без сообщества', author=user)
+        response = client.get(url)
+        assert response.context is None, 'Проверьте, что запись вне сообщества не сбрасывает его страницу'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_username_change_resets_all_pages(self, client, user, post_with_group):
+        urls = ['/', f'/group/{post_with_group.group.slug}']
+        for url in urls:
+            client.get(url)
+        user.username = 'renamed_author'
+        user.save()
+        for url in urls:
+            response = client.get(url)
+            assert response.context is not None and 'renamed_author' in response.content.decode(), \
+                f'Проверьте, что смена имени автора сбрасывает кэш страницы `{url}`'
+
+    def test_local_cache_keeps_versions_short(self, settings):
+        from posts.page_cache import shared_timeout
+        assert shared_timeout(None) == settings.LOCAL_CACHE_TIMEOUT, \
+            'Проверьте, что с кэшем в памяти процесса версии не живут вечно'
+        assert shared_timeout(settings.PAGE_CACHE_TIMEOUT) == settings.LOCAL_CACHE_TIMEOUT
+        settings.CACHES = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+        assert shared_timeout(None) is None and shared_timeout(60) == 60, \
+            'Проверьте, что общий кэш хранит версии без таймаута'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_logged_in_users_are_not_cached(self, user_client, post):
+        user_client.get('/')
+        response = user_client.get('/')
+        assert response.context is not None, 'Проверьте, что страницы авторизованных пользователей не кэшируются'
+
+
+class TestPostCardCache:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_cards_depend_on_viewer_and_content(self, user_client, user):
+        from django.core.cache import cache
+        from django.test import Client
+        from posts.templatetags.post_filters import card_keys
+
+        post = Post.objects.create(text='Тестовый пост без картинки', author=user)
+
+        response = user_client.get('/')
+        assert 'Редактировать' in response.content.decode(), 'Проверьте, что автор видит ссылку на редактирование'
+        assert cache.get(card_keys([post], user)[0]) is not None, 'Проверьте, что карточка записи сохраняется в кэше'
+
+        response = Client().get('/')
+        assert 'Редактировать' not in response.content.decode(), \
+            'Проверьте, что карточка автора не попадает к другим посетителям'
+
+        post.text = 'Отредактированный текст'
+        post.save()
+        response = user_client.get('/')
+        assert 'Отредактированный текст' in response.content.decode(), \
+            'Проверьте, что изменённая запись получает новую карточку'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_cached_cards_skip_loading_posts(self, user_client, user):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        for i in range(10):
+            Post.objects.create(text=f'Тестовый пост {i}', author=user)
+        user_client.get('/')
+        with CaptureQueriesContext(connection) as queries:
+            response = user_client.get('/')
+        assert 'Тестовый пост 9' in response.content.decode()
+        assert not any('"posts_post"."text"' in query['sql'] for query in queries), \
+            'Проверьте, что записи с карточками в кэше не загружаются целиком'
+
+
+class TestConditionalGet:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_anonymous_revalidation(self, user, post_with_group):
+        from django.test import Client
+        client = Client()
+        url = f'/{user.username}/{post_with_group.id}/'
+        response = client.get(url)
+        etag = response['ETag']
+        assert 'no-cache' in response['Cache-Control'], 'Проверьте, что браузер перепроверяет страницу'
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304 and response.context is None, \
+            'Проверьте, что неизменённая страница отдаётся ответом 304 без рендеринга'
+
+        Comment.objects.create(post=post_with_group, author=user, text='Новый комментарий')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200 and response['ETag'] != etag, \
+            'Проверьте, что комментарий меняет ETag страницы записи'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_logged_in_validators_depend_on_viewer(self, user_client, user, post, django_user_model):
+        from django.test import Client
+        another_user = django_user_model.objects.create_user(username='TestAuthor_2')
+        url = f'/{post.author.username}/'
+        response = user_client.get(url)
+        etag = response['ETag']
+        assert not response.has_header('Last-Modified') and 'private' in response['Cache-Control'], \
+            'Проверьте, что страницы вошедших пользователей не получают общий Last-Modified'
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304 and response.context is None
+
+        other = Client()
+        other.force_login(another_user)
+        assert other.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 200, \
+            'Проверьте, что ETag различается для разных пользователей'
+
+        from posts.models import Follow
+        Follow.objects.create(user=user, author=another_user)
+        response = user_client.get(f'/{another_user.username}/')
+        etag = response['ETag']
+        Follow.objects.filter(user=user, author=another_user).delete()
+        assert user_client.get(f'/{another_user.username}/', HTTP_IF_NONE_MATCH=etag).status_code == 200, \
+            'Проверьте, что отписка меняет ETag страницы автора'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_cache_control_header(self, user_client, post):
+        from django.test import Client
+        for _ in range(2):
+            # второй ответ анониму приходит из кэша страниц
+            response = Client().get('/')
+            assert response['Cache-Control'] == 'no-cache, public', \
+                'Проверьте, что страницы для анонимов можно хранить в общих кэшах'
+        response = user_client.get('/')
+        assert response['Cache-Control'] == 'no-cache, private', \
+            'Проверьте, что страницы вошедших пользователей не попадают в общие кэши'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_last_modified_for_settled_versions(self, post):
+        from django.core.cache import cache
+        from django.test import Client
+        from posts.page_cache import version_key
+        cache.set_many({version_key(('site',)): 1_600_000_000_000_000,
+                        version_key(('global',)): 1_600_000_000_500_000}, None)
+        response = Client().get('/')
+        assert response['Last-Modified'] == 'Sun, 13 Sep 2020 12:26:40 GMT', \
+            'Проверьте, что Last-Modified берётся из самой новой версии областей страницы'
+        response = Client().get('/', HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        assert response.status_code == 304
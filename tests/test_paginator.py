@@ -2,6 +2,8 @@ import pytest
 
 from django.core.paginator import Paginator, Page
 
+from posts.pagination import CursorPage, CursorPaginator
+
 
 class TestGroupPaginatorView:
 
@@ -17,12 +19,18 @@ class TestGroupPaginatorView:
 
         assert 'paginator' in response.context, \
             'Проверьте, что передали переменную `paginator` в контекст страницы `/group/<slug>/`'
-        assert type(response.context['paginator']) == Paginator, \
-            'Проверьте, что переменная `paginator` на странице `/group/<slug>/` типа `Paginator`'
+        assert type(response.context['paginator']) == CursorPaginator, \
+            'Проверьте, что первая страница `/group/<slug>/` листается курсором без COUNT(*)'
         assert 'page' in response.context, \
             'Проверьте, что передали переменную `page` в контекст страницы `/group/<slug>/`'
+        assert type(response.context['page']) == CursorPage and len(response.context['page']) == 1, \
+            'Проверьте, что переменная `page` на странице `/group/<slug>/` типа `CursorPage`'
+
+        response = client.get(f'/group/{post_with_group.group.slug}?page=1')
+        assert type(response.context['paginator']) == Paginator, \
+            'Проверьте, что переменная `paginator` на странице `/group/<slug>/?page=1` типа `Paginator`'
         assert type(response.context['page']) == Page, \
-            'Проверьте, что переменная `page` на странице `/group/<slug>/` типа `Page`'
+            'Проверьте, что переменная `page` на странице `/group/<slug>/?page=1` типа `Page`'
 
     @pytest.mark.django_db(transaction=True)
     def test_index_paginator_view_get(self, client, post_with_group):
@@ -30,9 +38,15 @@ class TestGroupPaginatorView:
         assert response.status_code != 404, 'Страница `/` не найдена, проверьте этот адрес в *urls.py*'
         assert 'paginator' in response.context, \
             'Проверьте, что передали переменную `paginator` в контекст страницы `/`'
-        assert type(response.context['paginator']) == Paginator, \
-            'Проверьте, что переменная `paginator` на странице `/` типа `Paginator`'
+        assert type(response.context['paginator']) == CursorPaginator, \
+            'Проверьте, что первая страница `/` листается курсором без COUNT(*)'
         assert 'page' in response.context, \
             'Проверьте, что передали переменную `page` в контекст страницы `/`'
+        assert type(response.context['page']) == CursorPage and len(response.context['page']) == 1, \
+            'Проверьте, что переменная `page` на странице `/` типа `CursorPage`'
+
+        response = client.get('/?page=1')
+        assert type(response.context['paginator']) == Paginator, \
+            'Проверьте, что переменная `paginator` на странице `/?page=1` типа `Paginator`'
         assert type(response.context['page']) == Page, \
-            'Проверьте, что переменная `page` на странице `/` типа `Page`'
+            'Проверьте, что переменная `page` на странице `/?page=1` типа `Page`'
@@ -0,0 +1,62 @@
+import json
+import os
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+
+
+class TestProfiling:
+
+    def profiles(self, directory):
+        return sorted(name for name in os.listdir(directory) if name.endswith('.json'))
+
+    @pytest.mark.django_db(transaction=True)
+    def test_samples_every_nth_request(self, settings, tmp_path, post):
+        settings.PROFILE_SAMPLE_RATE = 2
+        settings.PROFILE_DIR = str(tmp_path)
+        # анонимный ответ пришёл бы из кэша страниц без запросов к базе
+        client = Client()
+        client.force_login(post.author)
+        for _ in range(4):
+            client.get(f'/{post.author.username}/{post.id}/')
+
+        names = self.profiles(tmp_path)
+        assert len(names) == 2, 'Проверьте, что под cProfile идёт каждый PROFILE_SAMPLE_RATE-й запрос'
+        meta = json.loads((tmp_path / names[0]).read_text())
+        assert meta['view'] == 'post' and meta['kind'] == 'prof', \
+            'Проверьте, что рядом с профилем сохраняется имя маршрута'
+        assert meta['queries'] and 'sql' in meta['queries'][0], \
+            'Проверьте, что рядом с профилем сохраняется журнал SQL'
+        assert (tmp_path / names[0].replace('.json', '.prof')).exists()
+
+        output = StringIO()
+        call_command('profile_report', dir=str(tmp_path), stdout=output)
+        report = output.getvalue()
+        assert 'post ' in report and 'cProfile, 2 запросов' in report, \
+            'Проверьте, что profile_report сводит профили по представлениям'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_slow_requests_keep_stacks(self, settings, tmp_path, post):
+        settings.PROFILE_SLOW_MS = 0
+        settings.PROFILE_SAMPLE_INTERVAL = 0.001
+        settings.PROFILE_DIR = str(tmp_path)
+        settings.PROFILE_KEEP = 3
+        client = Client()
+        for _ in range(5):
+            client.get(f'/{post.author.username}/{post.id}/')
+
+        names = self.profiles(tmp_path)
+        assert 0 < len(names) <= 3, 'Проверьте, что в каталоге остаются только PROFILE_KEEP последних профилей'
+        assert len(os.listdir(tmp_path)) == 2 * len(names), 'Проверьте, что старые профили удаляются целиком'
+        output = StringIO()
+        call_command('profile_report', dir=str(tmp_path), stdout=output)
+        assert 'Стеки сэмплера' in output.getvalue()
+
+    @pytest.mark.django_db(transaction=True)
+    def test_fast_requests_are_not_saved(self, settings, tmp_path, post):
+        settings.PROFILE_SLOW_MS = 60_000
+        settings.PROFILE_DIR = str(tmp_path)
+        Client().get(f'/{post.author.username}/{post.id}/')
+        assert not os.listdir(tmp_path), 'Проверьте, что быстрые запросы не сохраняются'
@@ -0,0 +1,44 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+from django.core.files.base import ContentFile
+from django.test import Client
+
+from posts.models import Comment, Follow, Group, Post
+
+
+class TestQueryBudget:
+
+    def fill(self, user, author, group, count):
+        buffer = BytesIO()
+        Image.new('RGB', (100, 80)).save(buffer, 'JPEG')
+        for i in range(count):
+            post = Post(text=f'Запись номер {i}', author=author, group=group)
+            if i % 2:
+                post.image.save(f'budget_{i}.jpg', ContentFile(buffer.getvalue()), save=False)
+            post.save()
+            Comment.objects.create(post=post, author=user, text='Комментарий')
+        return post
+
+    @pytest.mark.django_db(transaction=True)
+    def test_views_within_budget(self, settings, tmp_path, assert_query_budget, user_client, user,
+                                 django_user_model):
+        settings.MEDIA_ROOT = str(tmp_path)
+        author = django_user_model.objects.create_user(username='BudgetAuthor')
+        group = Group.objects.create(title='Бюджет', slug='budget')
+        Follow.objects.create(user=user, author=author)
+        for count in (3, 12):
+            post = self.fill(user, author, group, count)
+            for url in ('/', '/group/budget', f'/{author.username}/', f'/{author.username}/{post.pk}/',
+                        '/follow/', '/search/?q=запись', f'/{author.username}/{post.pk}/comment/'):
+                # миниатюры в тестах строятся прямо в запросе, в бою это делает фоновый пул
+                user_client.get(url)
+                response = assert_query_budget(url, user_client)
+                assert response.status_code == 200
+
+    @pytest.mark.django_db(transaction=True)
+    def test_headers(self, post):
+        response = Client().get('/')
+        assert int(response['X-DB-Queries']) >= 1 and float(response['X-DB-Time']) >= 0, \
+            'Проверьте, что ответ содержит число запросов и время в базе'
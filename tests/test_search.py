@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from django.core.management import call_command
+
+from posts import fulltext
+from posts.models import Post
+
+
+class TestSearch:
+
+    def test_stemmer_merges_word_forms(self):
+        assert fulltext.stem('кошки') == fulltext.stem('кошкам') == fulltext.stem('Кошка'), \
+            'Проверьте, что стеммер приводит формы слова к одной основе'
+        assert fulltext.stem('python') == 'python', 'Проверьте, что латиница не искажается'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_search_finds_word_forms(self, client, user):
+        found = Post.objects.create(text='Наши кошки любят молоко', author=user)
+        Post.objects.create(text='Собаки любят кости', author=user)
+
+        response = client.get('/search/?q=кошкам молока')
+        page = response.context['page']
+        assert response.status_code == 200, 'Проверьте, что страница `/search/` доступна'
+        assert [post.pk for post in page] == [found.pk], 'Проверьте, что поиск учитывает формы слов'
+        assert '<mark>кошки</mark>' in response.content.decode(), 'Проверьте, что совпадения подсвечиваются'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_index_follows_edit_and_delete(self, user):
+        post = Post.objects.create(text='Первая версия текста', author=user)
+        post.text = 'Исправленный вариант'
+        post.save()
+        assert not list(fulltext.SearchResults('первая')[0:10]), \
+            'Проверьте, что индекс обновляется при редактировании записи'
+        assert [p.pk for p in fulltext.SearchResults('исправленный')[0:10]] == [post.pk]
+
+        post.delete()
+        assert fulltext.SearchResults('исправленный').count() == 0, \
+            'Проверьте, что запись удаляется из индекса'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_rebuild_command(self, user):
+        post = Post.objects.create(text='Запись для переиндексации', author=user)
+        fulltext.unindex(post.pk)
+        assert fulltext.SearchResults('переиндексации').count() == 0
+
+        call_command('rebuild_search_index')
+        assert fulltext.SearchResults('переиндексация').count() == 1, \
+            'Проверьте, что `rebuild_search_index` восстанавливает индекс'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_loaddata_is_indexed(self, user, tmp_path):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        fixture = tmp_path / 'posts.json'
+        fixture.write_text(json.dumps([{'model': 'posts.post', 'pk': 100, 'fields': {
+            'text': 'Как не стоит купаться в кипящем озере', 'pub_date': '2021-02-14T09:02:13.681Z',
+            'author': user.pk}}]), encoding='utf-8')
+        call_command('loaddata', str(fixture), verbosity=0)
+        assert fulltext.SearchResults('стоит').count() == 1, \
+            'Проверьте, что записи из loaddata попадают в поисковый индекс'
+
+        with CaptureQueriesContext(connection) as queries:
+            Post.objects.create(text='Ещё запись', author=user)
+        assert not any('sqlite_master' in query['sql'] for query in queries.captured_queries), \
+            'Проверьте, что наличие таблицы индекса не проверяется при каждом сохранении'
+
+    def test_snippet_is_escaped(self):
+        snippet = fulltext.highlight('<script>кошка</script>', 'кошка')
+        assert '<script>' not in snippet and '<mark>кошка</mark>' in snippet, \
+            'Проверьте, что фрагмент экранируется перед подсветкой'
@@ -0,0 +1,54 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.test import Client
+
+from posts import slow_queries
+
+
+class TestSlowQueries:
+
+    def test_fingerprint_ignores_values(self):
+        first = slow_queries.fingerprint('SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = \'x\' LIMIT 21')
+        second = slow_queries.fingerprint('SELECT  *  FROM t WHERE id IN (%s) AND name = \'y\' LIMIT 5')
+        assert first == second == 'SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?', \
+            'Проверьте, что отпечаток не зависит от значений и длины списков IN'
+
+    def test_full_scan_detection(self):
+        assert slow_queries.is_full_scan(['SCAN posts_post'])
+        assert not slow_queries.is_full_scan(['SEARCH posts_follow USING INDEX follow_user_author_idx (user_id=?)'])
+        assert not slow_queries.is_full_scan(['SCAN posts_post USING INDEX posts_post_pub_date'])
+
+    @pytest.mark.django_db(transaction=True)
+    def test_logs_queries_with_plan_and_view(self, settings, tmp_path, post, user):
+        settings.SLOW_QUERY_MS = 0
+        settings.SLOW_QUERY_LOG = str(tmp_path / 'slow.jsonl')
+        client = Client()
+        client.force_login(user)
+        client.get(f'/{post.author.username}/')
+
+        entries = list(slow_queries.read(settings.SLOW_QUERY_LOG))
+        follow = [entry for entry in entries if '"posts_follow"' in entry['sql'] and entry['view'] == 'profile']
+        assert follow, 'Проверьте, что медленные запросы пишутся в журнал с именем маршрута'
+        assert follow[0]['params'] and follow[0]['plan'], 'Проверьте, что в журнал попадают параметры и план'
+        assert 'follow_user_author_idx' in ' '.join(follow[0]['plan']), \
+            'Проверьте, что проверка подписки использует индекс (user, author)'
+        assert not any(json.dumps(entry).count('EXPLAIN QUERY PLAN') for entry in entries), \
+            'Проверьте, что собственные EXPLAIN не попадают в журнал'
+
+        output = StringIO()
+        call_command('slow_query_report', log=settings.SLOW_QUERY_LOG, view='profile', stdout=output)
+        report = output.getvalue()
+        assert 'представления: profile' in report and 'Отпечатков:' in report, \
+            'Проверьте, что slow_query_report группирует записи по отпечаткам'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_fast_queries_are_not_logged(self, settings, tmp_path, post, user):
+        settings.SLOW_QUERY_MS = 60_000
+        settings.SLOW_QUERY_LOG = str(tmp_path / 'slow.jsonl')
+        client = Client()
+        client.force_login(user)
+        client.get(f'/{post.author.username}/')
+        assert not (tmp_path / 'slow.jsonl').exists(), 'Проверьте, что запросы быстрее порога не пишутся'
@@ -0,0 +1,105 @@
+import gzip
+from wsgiref.util import setup_testing_defaults
+
+import pytest
+from django.core.management import call_command
+from django.template import Context, Template
+from django.test import override_settings
+
+from posts.staticfiles import StaticFilesHandler
+
+CSS = 'posts/bootstrap/dist/css/bootstrap.min.css'
+
+
+def fake_app(environ, start_response):
+    start_response('404 Not Found', [('Content-Type', 'text/plain')])
+    return [b'django']
+
+
+def get(handler, path, **headers):
+    environ = {}
+    setup_testing_defaults(environ)
+    environ['PATH_INFO'] = path
+    environ.update(headers)
+    result = {}
+
+    def start_response(status, response_headers):
+        result.update(status=status, headers=dict(response_headers))
+
+    body = b''.join(handler(environ, start_response))
+    return result['status'], result['headers'], body
+
+
+class TestStaticFiles:
+
+    @pytest.fixture(scope='class')
+    def collected_root(self, tmp_path_factory):
+        # со сжатием brotli collectstatic небыстрый — один раз на все тесты
+        root = tmp_path_factory.mktemp('static')
+        with override_settings(STATIC_ROOT=str(root)):
+            call_command('collectstatic', interactive=False, verbosity=0)
+        return root
+
+    @pytest.fixture
+    def collected(self, settings, collected_root):
+        settings.STATIC_ROOT = str(collected_root)
+        return collected_root
+
+    def test_urls_fall_back_without_manifest(self, settings, tmp_path, caplog):
+        settings.STATIC_ROOT = str(tmp_path)
+        url = Template(f"{{% load static %}}{{% static '{CSS}' %}}").render(Context())
+        assert url == f'/static/{CSS}', 'Проверьте, что без collectstatic ссылки ведут на исходные имена'
+        assert 'collectstatic' in caplog.text, 'Проверьте, что без DEBUG отсутствие манифеста пишется в лог'
+
+    def test_missing_brotli_is_logged(self, settings, tmp_path, caplog, monkeypatch):
+        from posts import staticfiles
+        monkeypatch.setattr(staticfiles, 'brotli', None)
+        settings.STATIC_ROOT = str(tmp_path)
+        call_command('collectstatic', interactive=False, verbosity=0)
+        assert 'brotli' in caplog.text, 'Проверьте, что без модуля brotli collectstatic предупреждает в лог'
+        assert not list(tmp_path.rglob('*.br'))
+
+    def test_hashed_compressed_and_immutable(self, collected):
+        url = Template(f"{{% load static %}}{{% static '{CSS}' %}}").render(Context())
+        assert url != f'/static/{CSS}' and url.endswith('.css'), 'Проверьте, что имена статики содержат хэш'
+        assert (collected / url[len('/static/'):]).with_name(url.rsplit('/', 1)[1] + '.gz').exists(), \
+            'Проверьте, что collectstatic сохраняет сжатую копию'
+
+        handler = StaticFilesHandler(fake_app)
+        status, headers, body = get(handler, url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+        assert status == '200 OK' and headers['Content-Encoding'] == 'gzip', \
+            'Проверьте, что клиент, принимающий gzip, получает сжатый файл'
+        assert 'immutable' in headers['Cache-Control'] and headers['Vary'] == 'Accept-Encoding'
+        assert headers['Content-Type'].startswith('text/css')
+        original = (collected / CSS).read_bytes()
+        assert gzip.decompress(body) == original and int(headers['Content-Length']) == len(body)
+
+        status, headers, body = get(handler, url, HTTP_ACCEPT_ENCODING='gzip;q=0')
+        assert 'Content-Encoding' not in headers and body == original, \
+            'Проверьте, что без поддержки gzip отдаётся исходный файл'
+
+        status, _, body = get(handler, url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=headers['ETag'])
+        assert status == '200 OK', 'ETag сжатого и исходного вариантов должны различаться'
+        _, gzip_headers, _ = get(handler, url, HTTP_ACCEPT_ENCODING='gzip')
+        status, _, body = get(handler, url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=gzip_headers['ETag'])
+        assert status == '304 Not Modified' and body == b''
+
+        _, headers, _ = get(handler, f'/static/{CSS}')
+        assert 'immutable' not in headers['Cache-Control'], 'Проверьте, что имена без хэша не кэшируются навсегда'
+
+    def test_brotli_preferred(self, collected):
+        brotli = pytest.importorskip('brotli')
+        url = Template(f"{{% load static %}}{{% static '{CSS}' %}}").render(Context())
+        assert (collected / url[len('/static/'):]).with_name(url.rsplit('/', 1)[1] + '.br').exists(), \
+            'Проверьте, что при установленном brotli collectstatic сохраняет .br'
+
+        handler = StaticFilesHandler(fake_app)
+        status, headers, body = get(handler, url, HTTP_ACCEPT_ENCODING='gzip, deflate, br')
+        assert status == '200 OK' and headers['Content-Encoding'] == 'br', \
+            'Проверьте, что клиент, принимающий br, получает вариант brotli'
+        assert brotli.decompress(body) == (collected / CSS).read_bytes() and int(headers['Content-Length']) == len(body)
+
+    def test_unknown_paths_reach_django(self, collected):
+        handler = StaticFilesHandler(fake_app)
+        assert get(handler, '/static/missing.css')[2] == b'django'
+        assert get(handler, '/')[2] == b'django'
@@ -0,0 +1,96 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+from django.core.files.base import ContentFile
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class TestThumbnails:
+
+    def create_post(self, user, name):
+        buffer = BytesIO()
+        Image.new('RGB', (1200, 900), color=(200, 30, 30)).save(buffer, 'JPEG')
+        post = Post(text='Запись с картинкой', author=user)
+        post.image.save(name, ContentFile(buffer.getvalue()), save=False)
+        post.save()
+        return post
+
+    @pytest.mark.django_db(transaction=True)
+    def test_resolve_page_in_bulk(self, settings, tmp_path, user):
+        settings.MEDIA_ROOT = str(tmp_path)
+        posts = [self.create_post(user, f'picture_{i}.jpg') for i in range(3)]
+        names = [post.image.name for post in posts]
+
+        assert thumbnails.resolve(names) == {}, 'Проверьте, что непостроенные миниатюры не выдаются'
+        # промахи построены сразу: в тестах THUMBNAIL_WORKERS = 0
+        from django.core.cache import cache
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            urls = thumbnails.resolve(names)
+        assert set(urls) == set(names), 'Проверьте, что промахи ставятся в очередь на построение'
+        assert len(queries) == 1, 'Проверьте, что миниатюры страницы разрешаются одним запросом к KV-хранилищу'
+        variants = urls[names[0]]
+        assert variants['src'].endswith('.jpg') and variants['complete']
+        assert variants['webp'].count('.webp') == 3, 'Проверьте, что строятся WebP-варианты всех ширин'
+        assert ' 1200w' in variants['jpeg'] and ' 1440w' not in variants['jpeg'], \
+            'Проверьте, что варианты не растягиваются шире исходника'
+
+        with CaptureQueriesContext(connection) as queries:
+            thumbnails.resolve(names)
+        assert len(queries) == 0, 'Проверьте, что повторное разрешение обслуживается кэшем'
+
+    def test_broken_pool_falls_back_to_lazy_building(self, settings, monkeypatch):
+        from concurrent.futures.process import BrokenProcessPool
+        from django.core.cache import cache
+
+        class BrokenPool:
+            def submit(self, *args):
+                raise BrokenProcessPool('воркер убит')
+
+            def shutdown(self, wait=True):
+                pass
+
+        settings.THUMBNAIL_WORKERS = 2
+        monkeypatch.setattr(thumbnails, '_executor', BrokenPool())
+        thumbnails.schedule('posts/picture.jpg')
+        assert thumbnails._executor is None, 'Проверьте, что сломанный пул сбрасывается'
+        assert cache.add('thumbnail_queued:posts/picture.jpg', True), \
+            'Проверьте, что миниатюры снова поставятся в очередь при следующем показе'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_pending_card_is_placeholder_and_not_cached(self, settings, tmp_path, user, monkeypatch):
+        from django.test import Client
+        settings.MEDIA_ROOT = str(tmp_path)
+        post = self.create_post(user, 'pending.jpg')
+        built = []
+        # пул ещё не построил миниатюры
+        monkeypatch.setattr(thumbnails, 'schedule', built.append)
+
+        client = Client()
+        response = client.get('/')
+        content = response.content.decode()
+        assert post.image.url not in content and 'Изображение готовится' in content, \
+            'Проверьте, что до построения миниатюры вместо оригинала выводится заглушка'
+        assert not response.has_header('ETag') and built == [post.image.name]
+        assert client.get('/').context is not None, \
+            'Проверьте, что страница с недостроенными миниатюрами не кладётся в кэш'
+
+        thumbnails.generate(post.image.name)
+        client.get('/')
+        response = client.get('/')
+        assert response.context is None and response.has_header('ETag'), \
+            'Проверьте, что после построения миниатюр страница снова кэшируется'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_failed_source_does_not_block_page_cache(self, user):
+        from django.test import Client
+        Post.objects.create(text='Запись с пропавшей картинкой', author=user, image='posts/missing.jpg')
+        client = Client()
+        client.get('/')
+        assert client.get('/').context is None, \
+            'Проверьте, что исходник, на котором построение упало, не мешает кэшировать страницу'
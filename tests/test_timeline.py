@@ -0,0 +1,162 @@
+import pytest
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from posts.models import Follow, Post, TimelineEntry
+
+
+class TestTimeline:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_fan_out_backfill_and_cleanup(self, user):
+        author = get_user_model().objects.create_user(username='TestAuthor_1')
+        old = Post.objects.create(text='Старая запись', author=author)
+
+        follow = Follow.objects.create(user=user, author=author)
+        assert TimelineEntry.objects.filter(user=user, post=old).exists(), \
+            'Проверьте, что при подписке в ленту попадают прежние записи автора'
+
+        new = Post.objects.create(text='Новая запись', author=author)
+        assert TimelineEntry.objects.filter(user=user, post=new).exists(), \
+            'Проверьте, что новая запись раскладывается по лентам подписчиков'
+
+        follow.delete()
+        assert not TimelineEntry.objects.filter(user=user).exists(), \
+            'Проверьте, что при отписке записи автора удаляются из ленты'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_backfill_large_author(self, user):
+        author = get_user_model().objects.create_user(username='TestAuthor_3')
+        Post.objects.bulk_create([Post(text=f'Запись {i}', author=author) for i in range(600)])
+        Follow.objects.create(user=user, author=author)
+        assert TimelineEntry.objects.filter(user=user).count() == 600, \
+            'Проверьте, что подписка на автора с сотнями записей переносит их все в ленту'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_merge_on_read_for_popular_authors(self, settings, user_client, user):
+        settings.TIMELINE_FANOUT_LIMIT = 0
+        author = get_user_model().objects.create_user(username='TestAuthor_2')
+        Follow.objects.create(user=user, author=author)
+        Post.objects.create(text='Запись популярного автора', author=author)
+
+        assert not TimelineEntry.objects.exists(), \
+            'Проверьте, что записи популярных авторов не раскладываются по лентам'
+        response = user_client.get('/follow/')
+        assert len(response.context['page']) == 1, \
+            'Проверьте, что записи популярных авторов подмешиваются в ленту при чтении'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_keyset_pages_over_timeline_and_merged(self, settings, user_client, user):
+        from posts.timeline import keyset
+        settings.TIMELINE_FANOUT_LIMIT = 1
+        regular, popular = [get_user_model().objects.create_user(username=f'TestAuthor_{i}') for i in (4, 5)]
+        reader = get_user_model().objects.create_user(username='TestReader_1')
+        for author in (regular, popular):
+            Follow.objects.create(user=user, author=author)
+        Follow.objects.create(user=reader, author=popular)
+        posts = [Post.objects.create(text=f'Запись {i}', author=(regular, popular)[i % 2]) for i in range(25)]
+        Post.objects.create(text='Чужая запись', author=reader)
+        newest_first = [post.pk for post in reversed(posts)]
+
+        seen, url = [], '/follow/'
+        while url:
+            page = user_client.get(url).context['page']
+            seen += [post.pk for post in page]
+            url = f'/follow/?after={page.next_cursor}' if page.has_next() else None
+        assert seen == newest_first, 'Проверьте, что лента листается курсором без пропусков и повторов'
+        back = user_client.get(f'/follow/?before={page.previous_cursor}').context['page']
+        assert [post.pk for post in back] == newest_first[10:20]
+
+        keys = keyset(TimelineEntry.objects.filter(user=user), 'post_id', None, False)[:11]
+        sql, params = keys.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = ' '.join(row[-1] for row in cursor.fetchall())
+        assert 'timeline_user_feed_idx' in plan and 'TEMP B-TREE' not in plan, \
+            'Проверьте, что страница ленты читается по индексу без сортировки всей ленты'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_crossing_fanout_limit(self, settings, user_client, user):
+        settings.TIMELINE_FANOUT_LIMIT = 1
+        author = get_user_model().objects.create_user(username='TestAuthor_6')
+        reader = get_user_model().objects.create_user(username='TestReader_2')
+        Follow.objects.create(user=user, author=author)
+        before = Post.objects.create(text='До порога', author=author)
+
+        follow = Follow.objects.create(user=reader, author=author)
+        assert not TimelineEntry.objects.filter(author=author).exists(), \
+            'Проверьте, что выше порога записи автора убираются из лент'
+        over = Post.objects.create(text='Выше порога', author=author)
+        response = user_client.get('/follow/')
+        assert [post.pk for post in response.context['page']] == [over.pk, before.pk]
+
+        follow.delete()
+        assert set(TimelineEntry.objects.filter(user=user).values_list('post_id', flat=True)) == {before.pk, over.pk}, \
+            'Проверьте, что при возврате под порог ленты подписчиков заполняются заново'
+        response = user_client.get('/follow/')
+        assert [post.pk for post in response.context['page']] == [over.pk, before.pk]
+
+    @pytest.mark.django_db(transaction=True)
+    def test_rebalance_on_jump_over_limit(self, settings, user):
+        from posts import timeline
+        from posts.models import AuthorStats
+
+        settings.TIMELINE_FANOUT_LIMIT = 1
+        author = get_user_model().objects.create_user(username='TestAuthor_7')
+        Follow.objects.create(user=user, author=author)
+        post = Post.objects.create(text='Запись автора', author=author)
+        readers = [get_user_model().objects.create_user(username=f'TestReader_{i}') for i in (3, 4)]
+        # подписки без сигналов: счётчик сдвигается сразу на две
+        Follow.objects.bulk_create(Follow(user=reader, author=author) for reader in readers)
+        AuthorStats.objects.recount(author)
+        timeline.rebalance(author.pk, 2)
+        assert not TimelineEntry.objects.filter(author=author).exists(), \
+            'Проверьте, что порог учитывается, даже если счётчик перескочил через него'
+
+        AuthorStats.objects.filter(pk=author.pk).update(followers_count=0)
+        timeline.rebalance(author.pk, -3)
+        assert TimelineEntry.objects.filter(user=user, post=post).exists(), \
+            'Проверьте, что ленты заполняются заново, если счётчик опустился ниже порога сразу на несколько'
+
+
+class TestRecentPostsFeed:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_merged_feed(self, settings, user_client, user):
+        from django.core.cache import cache
+        from posts.pagination import CursorPage
+
+        cache.clear()
+        settings.FOLLOW_FEED_BACKEND = 'recent'
+        settings.RECENT_POSTS_PER_AUTHOR = 4
+        authors = [get_user_model().objects.create_user(username=f'TestAuthor_{i}') for i in range(3)]
+        for author in authors:
+            Follow.objects.create(user=user, author=author)
+        posts = [Post.objects.create(text=f'Запись {i}', author=authors[i % 3]) for i in range(15)]
+        Post.objects.create(text='Чужая запись', author=user)
+        newest_first = [post.pk for post in reversed(posts)]
+
+        response = user_client.get('/follow/')
+        page = response.context['page']
+        assert type(page) == CursorPage
+        assert [post.pk for post in page] == newest_first[:10], \
+            'Проверьте, что лента подписок собирается слиянием последних записей авторов'
+
+        response = user_client.get(f'/follow/?after={page.next_cursor}')
+        assert [post.pk for post in response.context['page']] == newest_first[10:], \
+            'Проверьте, что страницы глубже колец отдаются из базы'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_rings_only_for_recent_backend(self, settings, user):
+        from django.core.cache import cache
+        from posts import recent_posts
+
+        Post.objects.create(text='Запись', author=user)
+        assert cache.get(recent_posts.cache_key(user.pk)) is None, \
+            'Проверьте, что при ленте timeline кольца последних записей не обновляются'
+
+        settings.FOLLOW_FEED_BACKEND = 'recent'
+        post = Post.objects.create(text='Ещё запись', author=user)
+        assert cache.get(recent_posts.cache_key(user.pk))[0][1] == post.pk
+        assert cache._expire_info[cache.make_key(recent_posts.cache_key(user.pk))] is not None, \
+            'Проверьте, что кольцо в кэше процесса истекает'
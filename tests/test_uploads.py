@@ -0,0 +1,66 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from posts.forms import PostForm
+
+
+def jpeg_upload(size, orientation=None):
+    image = Image.new('RGB', size, color=(10, 120, 200))
+    exif = Image.Exif()
+    exif[0x010f] = 'Тестовая камера'
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', exif=exif.tobytes())
+    return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+
+class TestImageUpload:
+
+    @pytest.mark.django_db(transaction=True)
+    def test_downscale_and_strip_metadata(self, settings):
+        settings.UPLOAD_IMAGE_MAX_SIDE = 400
+        form = PostForm(data={'text': 'Запись с фото'}, files={'image': jpeg_upload((1600, 800), orientation=6)})
+        assert form.is_valid(), form.errors
+
+        with Image.open(form.cleaned_data['image']) as image:
+            assert image.size == (200, 400), \
+                'Проверьте, что изображение уменьшается до UPLOAD_IMAGE_MAX_SIDE с учётом поворота из EXIF'
+            assert not image.getexif(), 'Проверьте, что метаданные EXIF удаляются из загруженного изображения'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_reject_too_many_pixels(self, settings):
+        settings.UPLOAD_IMAGE_MAX_PIXELS = 1000
+        form = PostForm(data={'text': 'Запись с фото'}, files={'image': jpeg_upload((100, 100))})
+        assert not form.is_valid(), 'Проверьте, что слишком большие по разрешению изображения отклоняются'
+        assert 'image' in form.errors
+
+    @pytest.mark.django_db(transaction=True)
+    def test_lower_limit_for_fully_decoded_formats(self, settings):
+        settings.UPLOAD_IMAGE_MAX_DECODED_PIXELS = 5000
+        buffer = BytesIO()
+        Image.new('RGB', (100, 100)).save(buffer, 'PNG')
+        png = SimpleUploadedFile('picture.png', buffer.getvalue(), content_type='image/png')
+        form = PostForm(data={'text': 'Запись с картинкой'}, files={'image': png})
+        assert not form.is_valid() and 'image' in form.errors, \
+            'Проверьте, что PNG проверяется по UPLOAD_IMAGE_MAX_DECODED_PIXELS'
+
+        form = PostForm(data={'text': 'Запись с фото'}, files={'image': jpeg_upload((100, 100))})
+        assert form.is_valid(), 'Проверьте, что JPEG, который декодируется в уменьшенном масштабе, принимается'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_other_formats_are_reencoded(self):
+        buffer = BytesIO()
+        Image.new('P', (120, 60)).save(buffer, 'GIF')
+        gif = SimpleUploadedFile('animation.gif', buffer.getvalue(), content_type='image/gif')
+        form = PostForm(data={'text': 'Запись с картинкой'}, files={'image': gif})
+        assert form.is_valid(), form.errors
+
+        image_file = form.cleaned_data['image']
+        assert image_file.name == 'animation.png' and image_file.content_type == 'image/png'
+        with Image.open(image_file) as image:
+            assert image.format == 'PNG' and image.size == (120, 60), \
+                'Проверьте, что форматы без параметров сохранения пересохраняются в PNG'
@@ -46,6 +46,13 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # снаружи остальных, чтобы в профиль попадали и они
+    'posts.middleware.ProfilingMiddleware',
+    # время ответа включает все middleware ниже
+    'posts.middleware.MetricsMiddleware',
+    # до middleware Django, чтобы учитывать и запросы сессий и аутентификации;
+    # профилирование и метрики выше него к базе не обращаются
+    'posts.middleware.QueryStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -126,10 +133,25 @@ STATICFILES_DIRS = [
     os.path.join(BASE_DIR, 'users/static'),
 ]
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
+# Имена с хэшем содержимого и сжатые копии (.gz, .br) при collectstatic, см. posts/staticfiles.py
+STATICFILES_STORAGE = 'posts.staticfiles.CompressedManifestStaticFilesStorage'
 
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Кто отдаёт тело медиафайлов: None — Django через FileResponse (sendfile при поддержке сервера),
+# 'X-Accel-Redirect' — nginx с internal-локацией MEDIA_ACCEL_REDIRECT_PREFIX, 'X-Sendfile' — Apache/lighttpd
+MEDIA_SENDFILE_HEADER = os.environ.get('MEDIA_SENDFILE_HEADER') or None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
+
+# Загрузки изображений: крупные файлы Django пишет во временный файл, а не в память
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2 * 2 ** 20
+UPLOAD_IMAGE_MAX_BYTES = 50 * 2 ** 20
+UPLOAD_IMAGE_MAX_PIXELS = 60 * 10 ** 6
+# PNG, WebP и прочие форматы декодируются целиком (4 байта на пиксель) — для них предел ниже
+UPLOAD_IMAGE_MAX_DECODED_PIXELS = 16 * 10 ** 6
+# Длинная сторона сохраняемого оригинала
+UPLOAD_IMAGE_MAX_SIDE = 2560
 
 LOGIN_URL = '/auth/login/'
 LOGIN_REDIRECT_URL = 'index'
@@ -138,19 +160,89 @@ LOGIN_REDIRECT_URL = 'index'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 SITE_ID = 1
+# Версии страниц (posts/page_cache.py) должны быть общими для всех воркеров: в продакшене
+# нужен memcached или кэш в базе, например CACHE_BACKEND=django.core.cache.backends.memcached.MemcachedCache
+# и CACHE_LOCATION=127.0.0.1:11211. Кэш в памяти процесса годится для разработки
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-        'LOCATION': 'unique-snowflake',
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'unique-snowflake'),
     },
 }
 
+# Страницы для анонимных посетителей инвалидируются версиями (posts/page_cache.py),
+# таймаут лишь ограничивает время жизни неиспользуемых ключей
+PAGE_CACHE_TIMEOUT = 60 * 60
+# С кэшем в памяти процесса сдвиг версии не доходит до других воркеров —
+# версии и страницы там живут не дольше этого, секунды
+LOCAL_CACHE_TIMEOUT = 20
+# Карточки записей кэшируются под ключом из их содержимого и не требуют инвалидации
+POST_CARD_TIMEOUT = 60 * 60 * 24
+# До скольких строк админка считает выборку точно; дальше показывает оценку
+ADMIN_EXACT_COUNT_LIMIT = 10000
+
 TEST_CACHES = {
     'default': {
         'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
     }
 }
 
+# Заголовки X-DB-Queries и X-DB-Time в ответах; в лог posts.middleware числа пишутся всегда
+QUERY_STATS_HEADERS = True
+# Сколько SQL-запросов может выполнить представление (по имени маршрута) при любом объёме данных.
+# Превышение пишется в лог предупреждением, тесты проверяют бюджеты в tests/test_query_budget.py
+QUERY_BUDGETS = {
+    'index': 4,
+    'group': 5,
+    'profile': 7,
+    'post': 7,
+    'follow_index': 5,
+    'search': 6,
+    'add_comment': 6,
+    'api_posts': 3,
+    'api_post': 3,
+    'api_post_comments': 4,
+    'api_groups': 3,
+    'api_feed': 5,
+}
+
+# Запросы к базе дольше порога в мс пишутся с EXPLAIN в лог posts.slow_queries; None — выключено
+SLOW_QUERY_MS = float(os.environ['SLOW_QUERY_MS']) if os.environ.get('SLOW_QUERY_MS') else None
+# Файл JSON Lines с медленными запросами для slow_query_report; None — только лог
+SLOW_QUERY_LOG = os.environ.get('SLOW_QUERY_LOG', os.path.join(BASE_DIR, 'logs', 'slow_queries.jsonl'))
+
+# Каталог, через который процессы-воркеры складывают метрики для /metrics; None — только свой процесс
+METRICS_DIR = os.environ.get('METRICS_DIR')
+# Как часто процесс сбрасывает свои метрики в METRICS_DIR, секунды
+METRICS_FLUSH_INTERVAL = 1
+# С каких адресов Prometheus может читать /metrics
+METRICS_ALLOWED_IPS = ['127.0.0.1']
+
+# Профилирование запросов (posts.middleware.ProfilingMiddleware): каждый N-й запрос процесса
+# под cProfile; 0 — выключено
+PROFILE_SAMPLE_RATE = int(os.environ.get('PROFILE_SAMPLE_RATE', 0))
+# Запросы медленнее порога в мс сохраняются со стеками фонового сэмплера; None — выключено
+PROFILE_SLOW_MS = float(os.environ['PROFILE_SLOW_MS']) if os.environ.get('PROFILE_SLOW_MS') else None
+# Как часто сэмплер снимает стеки, секунды
+PROFILE_SAMPLE_INTERVAL = 0.005
+# Куда пишутся профили и сколько последних хранится
+PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(BASE_DIR, 'profiles'))
+PROFILE_KEEP = 200
+
+# Процессы, строящие миниатюры загруженных изображений в фоне; 0 — строить в запросе
+THUMBNAIL_WORKERS = 2
+
 INTERNAL_IPS = [
         "127.0.0.1",
-]
\ No newline at end of file
+]
+# Лента подписок: записи авторов, у которых подписчиков больше порога,
+# не раскладываются по лентам, а подмешиваются при чтении.
+TIMELINE_FANOUT_LIMIT = 10000
+# Сколько последних записей автора попадает в ленту при новой подписке
+TIMELINE_BACKFILL = 1000
+# Источник ленты подписок: 'timeline' — материализованная лента,
+# 'recent' — слияние колец последних записей авторов из кэша
+FOLLOW_FEED_BACKEND = 'timeline'
+RECENT_POSTS_PER_AUTHOR = 200
+# Сколько живёт кольцо автора без обновлений, секунды
+RECENT_POSTS_TIMEOUT = 60 * 60 * 24
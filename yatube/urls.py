@@ -15,11 +15,13 @@ Including another URLconf
 '''
 
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.flatpages import views
 from django.urls import include, path
 
+from posts import media
+from posts.metrics import metrics_view
+
 handler404 = "posts.views.page_not_found"
 handler500 = "posts.views.server_error"
 
@@ -37,6 +39,10 @@ urlpatterns += [
          name='about-author'),
     path('about-spec/', views.flatpage, {'url': '/about-spec/'},
          name='about-spec'),
+    path('metrics', metrics_view, name='metrics'),
+    # медиафайлы отдаются и без DEBUG; статику — posts.staticfiles.StaticFilesHandler в yatube/wsgi.py
+    path(f"{settings.MEDIA_URL.lstrip('/')}<path:path>", media.serve, name='media'),
+    path('api/', include('posts.api_urls')),
     path('', include('posts.urls')),
 ]
 
@@ -45,8 +51,3 @@ if settings.DEBUG:
 
     urlpatterns += (path("__debug__/", include(debug_toolbar.urls)),)
 
-if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL,
-                          document_root=settings.MEDIA_ROOT)
-    urlpatterns += static(settings.STATIC_URL,
-                          document_root=settings.STATIC_ROOT)
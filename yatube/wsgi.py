@@ -2,6 +2,8 @@
 WSGI config for yatube project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
+Collected static files are served by posts.staticfiles.StaticFilesHandler
+before requests reach Django.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/2.2/howto/deployment/wsgi/
@@ -14,3 +16,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+from posts.staticfiles import StaticFilesHandler  # noqa: E402
+
+application = StaticFilesHandler(application)